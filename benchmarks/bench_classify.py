@@ -0,0 +1,132 @@
+"""Latencia de /classify: clasificador guardado + micro-lotes, sin la capa HTTP.
+
+Entrena con un chat sintetico, guarda el modelo como artefacto, lo vuelve a
+cargar con mmap y mide la latencia por mensaje con pedidos concurrentes:
+la de cada pedido (incluye la espera en la cola) y el costo por mensaje de
+cada lote (duracion del lote / mensajes). Marca si el p99 supera --target-ms.
+
+Uso:
+    python benchmarks/bench_classify.py --messages 20000 --concurrency 1 16 64 --methods kmeans lda
+"""
+import argparse
+import asyncio
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from services.chat_analyzer import ChatAnalyzer  # noqa: E402
+from services.micro_batcher import MicroBatcher  # noqa: E402
+from services.topic_classifier import TopicClassifier  # noqa: E402
+
+
+TOPICS = [
+    "partido futbol gol equipo jugador cancha",
+    "pizza cena comida queso restaurante postre",
+    "examen profesor nota tarea clase curso",
+    "pelicula cine actor estreno entrada serie",
+    "viaje playa hotel vuelo vacaciones maleta",
+]
+
+
+def make_message(rng):
+    words = rng.choice(TOPICS).split()
+    return " ".join(rng.choice(words) for _ in range(rng.randint(2, 8)))
+
+
+def make_chat(n, seed=42):
+    rng = random.Random(seed)
+    lines = [
+        f"{1 + i // 1440 % 28:02d}/01/23, {i // 60 % 24:02d}:{i % 60:02d} - "
+        f"5199{rng.randint(0, 9)}: {make_message(rng)}"
+        for i in range(n)
+    ]
+    return io.BytesIO("\n".join(lines).encode("utf-8"))
+
+
+class TimedBatches:
+    # Envuelve classify y anota cuanto tarda cada lote y de cuantos mensajes es
+    def __init__(self, fn):
+        self.fn = fn
+        self.batches = []
+
+    def __call__(self, items):
+        start = time.perf_counter()
+        results = self.fn(items)
+        self.batches.append((time.perf_counter() - start, len(items)))
+        return results
+
+    def per_message_ms(self):
+        # Un valor por mensaje: el costo de su lote repartido entre todos
+        return np.concatenate([
+            np.full(size, seconds * 1000 / size) for seconds, size in self.batches
+        ])
+
+
+async def measure(batcher, messages, concurrency):
+    latencies = []
+
+    async def client(chunk):
+        for message in chunk:
+            start = time.perf_counter()
+            await batcher.submit(message)
+            latencies.append(time.perf_counter() - start)
+
+    chunks = [messages[i::concurrency] for i in range(concurrency)]
+    start = time.perf_counter()
+    await asyncio.gather(*(client(chunk) for chunk in chunks))
+    elapsed = time.perf_counter() - start
+    batcher.close()
+    return np.array(latencies) * 1000, len(messages) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--methods", nargs="+", default=["kmeans", "minibatch_kmeans", "nmf", "lda"])
+    parser.add_argument("--max-batch", type=int, default=256)
+    parser.add_argument("--target-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as artifact_dir:
+        analyzer = ChatAnalyzer(artifact_dir=artifact_dir)
+        df = analyzer.load_chat(make_chat(args.messages))
+
+        rng = random.Random(7)
+        # Mitad mensajes repetidos (cache caliente), mitad nuevos
+        pool = [make_message(rng) for _ in range(args.requests // 2)]
+        requests = pool + [make_message(rng) for _ in range(args.requests - len(pool))]
+        rng.shuffle(requests)
+
+        print(
+            f"{'motor':>17} {'concurr.':>8} {'p50 ms':>8} {'p99 ms':>8} {'msg/s':>9} "
+            f"{'lote':>6} {'ms/msg p99':>10} {'objetivo':>8}"
+        )
+        for method in args.methods:
+            analyzer.cluster_messages(df.copy(), method, save_as=method)
+            meta, vectorizer, model = analyzer.artifact_store.load(method)
+            classifier = TopicClassifier(meta, vectorizer, model, analyzer.preprocess_texts)
+
+            for concurrency in args.concurrency:
+                timed = TimedBatches(classifier.classify)
+                batcher = MicroBatcher(timed, max_batch=args.max_batch)
+                latencies, throughput = asyncio.run(measure(batcher, requests, concurrency))
+                per_message = np.percentile(timed.per_message_ms(), 99)
+                p99 = np.percentile(latencies, 99)
+                print(
+                    f"{method:>17} {concurrency:>8} {np.percentile(latencies, 50):>8.3f} "
+                    f"{p99:>8.3f} {throughput:>9.0f} {len(requests) / len(timed.batches):>6.1f} "
+                    f"{per_message:>10.3f} {'ok' if p99 <= args.target_ms else 'excede':>8}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""Tiempo y memoria de cada etapa del analisis, sobre chats sinteticos.
+
+Etapas: parse (lectura de lineas), preprocess (limpieza + lematizacion),
+load_chat (ambas juntas, como en /analyze), cluster_<motor> (cluster_messages
+completo) y response (reportes por tema + JSON). De load_chat y cluster_<motor>
+tambien se guardan los tiempos internos que registra metrics (parse,
+build_frame, dedup, vectorize, fit, keywords, ...) como <etapa>.<interna>.
+En la misma corrida, un hilo muestrea la memoria residente (RSS) cada pocos
+ms: peak_rss_mb es el maximo del proceso durante la etapa y rss_growth_mb
+cuanto crecio respecto del inicio. tracemalloc seria mas preciso pero vuelve
+20 veces mas lento el ajuste de LDA.
+
+Los chats se generan una vez en benchmarks/data/ y se reutilizan. El
+resultado se escribe en JSON (por defecto benchmarks/results/) y, con
+--compare, se contrasta con una corrida anterior: sale con codigo 1 si alguna
+etapa es mas lenta que la tolerancia.
+
+Uso:
+    python benchmarks/bench_pipeline.py --sizes 10000 100000 1000000 --engines lda kmeans
+    python benchmarks/bench_pipeline.py --sizes 10000 --compare benchmarks/results/base.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from importlib.metadata import PackageNotFoundError, version
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from generate_chat import generate_chat  # noqa: E402
+from services.chat_analyzer import ChatAnalyzer  # noqa: E402
+from services.chat_loader import iter_message_chunks, open_lines  # noqa: E402
+from services.json_stream import iter_json, topics_from_reports  # noqa: E402
+from services.metrics import collect, current_rss_bytes  # noqa: E402
+from services.report_builder import build_cluster_reports  # noqa: E402
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PACKAGES = ["numpy", "scipy", "pandas", "scikit-learn", "nltk", "orjson"]
+# Diferencias menores no cuentan como regresion (ruido en etapas cortas)
+MIN_DIFFERENCE_SECONDS = 0.05
+
+
+def chat_file(messages, options, data_dir):
+    # Un archivo por tamaño y parametros; generarlo (1M) toma ~30 s
+    name = "chat_{}_{}.txt".format(
+        messages, "_".join(f"{key}{value}" for key, value in sorted(options.items()))
+    )
+    path = os.path.join(data_dir, name)
+    if not os.path.exists(path):
+        os.makedirs(data_dir, exist_ok=True)
+        generate_chat(path + ".tmp", messages, **options)
+        os.replace(path + ".tmp", path)
+    return path
+
+
+class RSSSampler:
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss_bytes())
+
+    def __enter__(self):
+        self.start = self.peak = current_rss_bytes()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss_bytes())
+
+
+def measure(fn, memory=True, repeat=1):
+    # Mejor tiempo de repeat corridas (y su resultado); memoria de la primera
+    seconds = None
+    best = None
+    stats = {}
+    for run in range(repeat):
+        gc.collect()
+        sampler = RSSSampler() if memory and run == 0 else None
+        start = time.perf_counter()
+        if sampler is None:
+            result = fn()
+        else:
+            with sampler:
+                result = fn()
+            stats["peak_rss_mb"] = round(sampler.peak / 2 ** 20, 1)
+            stats["rss_growth_mb"] = round((sampler.peak - sampler.start) / 2 ** 20, 1)
+        elapsed = time.perf_counter() - start
+        if seconds is None or elapsed < seconds:
+            seconds, best = elapsed, result
+    return best, {"seconds": round(seconds, 4), **stats}
+
+
+def run_size(analyzer, path, args):
+    stages = {}
+
+    def stage(name, fn):
+        result, stats = measure(fn, args.memory, args.repeat)
+        stages[name] = stats
+        print(f"  {name:<20} {stats['seconds']:>9.3f} s" + (
+            f" {stats['peak_rss_mb']:>9.1f} MB (+{stats['rss_growth_mb']:.1f})"
+            if "peak_rss_mb" in stats else ""
+        ), flush=True)
+        return result
+
+    def collected(fn):
+        with collect() as timings:
+            return fn(), timings
+
+    def timed(name, fn):
+        # La etapa completa y, dentro de ella, los tiempos que registra metrics
+        result, timings = stage(name, lambda: collected(fn))
+        for inner, seconds in timings.stages.items():
+            stages[f"{name}.{inner}"] = {"seconds": round(seconds, 4)}
+            print(f"    {inner:<18} {seconds:>9.3f} s", flush=True)
+        return result, timings
+
+    def parse():
+        with open_lines(path) as lines:
+            return [record for chunk in iter_message_chunks(lines) for record in chunk]
+
+    def preprocess():
+        # Sin caches de mensajes ni lemas: cada corrida parte de cero
+        analyzer.clear_caches()
+        return analyzer.preprocess_texts(texts)
+
+    def load():
+        analyzer.clear_caches()
+        return analyzer.load_chat(path)
+
+    records = stage("parse", parse)
+    texts = [record[3] for record in records]
+    stage("preprocess", preprocess)
+    df, _ = timed("load_chat", load)
+
+    keywords = None
+    counters = {}
+    for method in args.engines:
+        (df, keywords), timings = timed(
+            f"cluster_{method}", lambda: analyzer.cluster_messages(df, method, args.groups)
+        )
+        counters = timings.counters
+
+    if keywords is not None:
+        meta = {"status": "success"}
+        stage("response", lambda: b"".join(iter_json(
+            meta, topics_from_reports(build_cluster_reports(df, keywords))
+        )))
+
+    return {
+        "messages": len(df),
+        "parsed_messages": len(records),
+        "unique_messages": counters.get("unique_messages"),
+        "vocabulary_size": counters.get("vocabulary_size"),
+        "stages": stages,
+    }
+
+
+def environment():
+    packages = {}
+    for name in PACKAGES:
+        try:
+            packages[name] = version(name)
+        except PackageNotFoundError:
+            packages[name] = None
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=HERE, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "git_commit": commit,
+        "packages": packages,
+    }
+
+
+def compare(current, baseline_path, tolerance):
+    # Devuelve las etapas mas lentas que baseline * (1 + tolerance)
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    previous = {result["size"]: result["stages"] for result in baseline["results"]}
+
+    regressions = []
+    print(f"\n{'tamaño':>9} {'etapa':<20} {'antes s':>9} {'ahora s':>9} {'ratio':>7}")
+    for result in current["results"]:
+        for name, stats in result["stages"].items():
+            before = previous.get(result["size"], {}).get(name)
+            if not before:
+                continue
+            ratio = stats["seconds"] / max(before["seconds"], 1e-9)
+            slower = (
+                ratio > 1 + tolerance
+                and stats["seconds"] - before["seconds"] > MIN_DIFFERENCE_SECONDS
+            )
+            if slower:
+                regressions.append((result["size"], name, ratio))
+            print(
+                f"{result['size']:>9} {name:<20} {before['seconds']:>9.3f} "
+                f"{stats['seconds']:>9.3f} {ratio:>7.2f}" + ("  <-- mas lento" if slower else "")
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--engines", nargs="+", default=["lda", "kmeans"])
+    parser.add_argument("--groups", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--no-memory", dest="memory", action="store_false")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--vocabulary", type=int, default=5000)
+    parser.add_argument("--media-ratio", type=float, default=0.05)
+    parser.add_argument("--emoji-ratio", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", default=os.path.join(HERE, "data"))
+    parser.add_argument("--output")
+    parser.add_argument("--compare")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    options = {
+        "users": args.users,
+        "vocabulary": args.vocabulary,
+        "media_ratio": args.media_ratio,
+        "emoji_ratio": args.emoji_ratio,
+        "seed": args.seed,
+    }
+    analyzer = ChatAnalyzer()
+    # NLTK, WordNet y sklearn se cargan antes de medir la primera etapa
+    analyzer.warm_up()
+
+    results = []
+    for size in args.sizes:
+        path = chat_file(size, options, args.data_dir)
+        print(f"{size} mensajes ({os.path.basename(path)})", flush=True)
+        results.append({"size": size, **run_size(analyzer, path, args)})
+
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment(),
+        "params": {
+            "engines": args.engines,
+            "groups": args.groups,
+            "repeat": args.repeat,
+            "memory": args.memory,
+            "generator": options,
+        },
+        "results": results,
+    }
+
+    output = args.output or os.path.join(
+        HERE, "results", f"pipeline_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nResultados en {output}")
+
+    if args.compare:
+        regressions = compare(report, args.compare, args.tolerance)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Throughput del preprocesamiento (tokenizar + lematizar) de 1 a N procesos.
+
+Uso:
+    python benchmarks/bench_preprocess.py --messages 200000 --max-workers 16
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from services.chat_analyzer import ChatAnalyzer  # noqa: E402
+
+
+WORDS = (
+    "hola como estas mañana vamos al cine ya voy jajaja que tal bien gracias "
+    "nos vemos luego partido futbol pizza comida reunion trabajo clase examen "
+    "profesor tarea casa familia viaje playa fiesta cumpleaños regalo xd ok"
+).split()
+
+
+def make_messages(n, seed=42):
+    rng = random.Random(seed)
+    return [
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 15)))
+        for _ in range(n)
+    ]
+
+
+def worker_counts(max_workers):
+    counts = [1]
+    while counts[-1] * 2 <= max_workers:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != max_workers:
+        counts.append(max_workers)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=200000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    args = parser.parse_args()
+
+    texts = make_messages(args.messages)
+    baseline = None
+    base_seconds = None
+
+    print(f"{'workers':>8} {'segundos':>10} {'msg/s':>12} {'speedup':>8}")
+    for workers in worker_counts(args.max_workers):
+        analyzer = ChatAnalyzer(
+            preprocess_workers=workers, preprocess_chunk_size=args.chunk_size
+        )
+        if analyzer.preprocessor is not None:
+            # Arranca el pool fuera de la medicion
+            analyzer.preprocessor.map(texts[:workers])
+
+        start = time.perf_counter()
+        result = analyzer.preprocess_texts(texts)
+        seconds = time.perf_counter() - start
+
+        if analyzer.preprocessor is not None:
+            analyzer.preprocessor.shutdown()
+
+        if baseline is None:
+            baseline, base_seconds = result, seconds
+        elif result != baseline:
+            raise SystemExit(f"La salida con {workers} workers difiere de la serial")
+
+        print(
+            f"{workers:>8} {seconds:>10.2f} {len(texts) / seconds:>12.0f} "
+            f"{base_seconds / seconds:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
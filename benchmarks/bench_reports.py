@@ -0,0 +1,66 @@
+"""Escalamiento del armado de reportes por tema (JSON, tema_N.txt y resumen).
+
+Uso:
+    python benchmarks/bench_reports.py --sizes 10000 100000 1000000 --groups 5
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from services.report_builder import (  # noqa: E402
+    build_cluster_reports,
+    render_summary,
+    render_topic_file,
+)
+
+
+def make_frame(n, n_groups, n_days=730, n_users=50, seed=42):
+    rng = np.random.default_rng(seed)
+    minutes = np.sort(rng.integers(0, n_days * 24 * 60, n))
+    return pd.DataFrame({
+        "fecha_hora": pd.Timestamp("2022-01-01") + pd.to_timedelta(minutes, unit="m"),
+        "usuario": pd.Categorical(rng.integers(0, n_users, n).astype(str)),
+        "mensaje_original": pd.Series(
+            [f"mensaje de prueba {i}" for i in range(n)], dtype=object
+        ),
+        "cluster": rng.integers(0, n_groups, n),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--groups", type=int, default=5)
+    args = parser.parse_args()
+
+    keywords = {i: [f"palabra{j}" for j in range(20)] for i in range(args.groups)}
+
+    print(f"{'mensajes':>10} {'reportes':>9} {'texto':>9} {'json':>9} {'us/msg':>8}")
+    for n in args.sizes:
+        df = make_frame(n, args.groups)
+
+        start = time.perf_counter()
+        reports = build_cluster_reports(df, keywords)
+        built = time.perf_counter()
+        for report in reports:
+            render_topic_file(report)
+        render_summary(reports)
+        rendered = time.perf_counter()
+        for report in reports:
+            report.messages.to_dict("records")
+        done = time.perf_counter()
+
+        print(
+            f"{n:>10} {built - start:>9.3f} {rendered - built:>9.3f} "
+            f"{done - rendered:>9.3f} {(done - start) / n * 1e6:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
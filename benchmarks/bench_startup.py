@@ -0,0 +1,141 @@
+"""Arranque en frio del servidor: cuanto tarda en aceptar conexiones y en estar listo.
+
+Levanta uvicorn en un proceso nuevo (directorio temporal, sin caches) y consulta
+/ready cada pocos ms: listen_seconds es la primera respuesta (aunque sea 503) y
+ready_seconds el primer 200, cuando NLTK, WordNet y sklearn ya se precargaron.
+Se toma la mediana de --runs arranques y sale con codigo 1 si pasa del
+presupuesto. Con --importtime muestra ademas los modulos mas lentos de importar.
+
+Uso:
+    python benchmarks/bench_startup.py --runs 5 --budget-listen 2 --budget-ready 10
+    python benchmarks/bench_startup.py --runs 1 --importtime 15
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SRC = os.path.join(HERE, "..", "src")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def environment():
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        path for path in (os.path.abspath(SRC), env.get("PYTHONPATH")) if path
+    )
+    return env
+
+
+def ready_status(url):
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except (urllib.error.URLError, ConnectionError, socket.timeout):
+        return None
+
+
+def cold_start(timeout):
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/ready"
+    listen = ready = None
+    with tempfile.TemporaryDirectory() as workdir:
+        start = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+            cwd=workdir,
+            env=environment(),
+        )
+        try:
+            while time.perf_counter() - start < timeout:
+                if process.poll() is not None:
+                    raise RuntimeError(f"El servidor termino con codigo {process.returncode}")
+                status = ready_status(url)
+                elapsed = time.perf_counter() - start
+                if status is not None and listen is None:
+                    listen = elapsed
+                if status == 200:
+                    ready = elapsed
+                    break
+                time.sleep(0.02)
+        finally:
+            process.terminate()
+            process.wait()
+    return listen, ready
+
+
+def import_times(top):
+    # -X importtime escribe en stderr: "import time: propio | acumulado | modulo"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=tempfile.gettempdir(),
+        env=environment(),
+        capture_output=True,
+        text=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((int(parts[1]), parts[2].strip()))
+    # Solo modulos de primer nivel o de services, para no repetir submodulos
+    rows = [
+        (micros, name) for micros, name in rows
+        if "." not in name or name.startswith("services.")
+    ]
+    for micros, name in sorted(rows, reverse=True)[:top]:
+        print(f"  {micros / 1e6:>7.3f} s  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--budget-listen", type=float, default=2.0)
+    parser.add_argument("--budget-ready", type=float, default=10.0)
+    parser.add_argument("--importtime", type=int, default=0, metavar="N")
+    args = parser.parse_args()
+
+    listens, readies = [], []
+    for run in range(args.runs):
+        listen, ready = cold_start(args.timeout)
+        print(
+            f"corrida {run + 1}: escucha {listen if listen is None else round(listen, 3)} s, "
+            f"lista {ready if ready is None else round(ready, 3)} s",
+            flush=True
+        )
+        if listen is not None:
+            listens.append(listen)
+        readies.append(ready if ready is not None else float("inf"))
+
+    listen = statistics.median(listens) if listens else float("inf")
+    ready = statistics.median(readies)
+    print(f"\nmediana: escucha {listen:.3f} s (presupuesto {args.budget_listen} s), "
+          f"lista {ready:.3f} s (presupuesto {args.budget_ready} s)")
+
+    if args.importtime:
+        print("\nimportacion de main, acumulado por modulo:")
+        import_times(args.importtime)
+
+    if listen > args.budget_listen or ready > args.budget_ready:
+        print("Fuera de presupuesto")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
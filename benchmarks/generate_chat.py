@@ -0,0 +1,188 @@
+"""Genera exportaciones de WhatsApp sinteticas con el formato que lee load_chat.
+
+Cada mensaje: "DD/MM/YY, HH:MM - <numero>: <texto>". Los textos salen de
+temas con vocabulario propio (frecuencias tipo Zipf) mas muletillas de chat,
+y se mezclan multimedia, stickers, enlaces, emojis, mensajes de varias lineas,
+cadenas reenviadas y avisos del sistema.
+
+Uso:
+    python benchmarks/generate_chat.py chat.txt --messages 100000 --users 30 --vocabulary 8000
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+
+
+BASE_WORDS = (
+    "partido futbol gol equipo cancha pizza cena comida almuerzo restaurante "
+    "examen profesor tarea clase curso nota trabajo reunion jefe oficina "
+    "pelicula cine serie estreno viaje playa hotel vuelo vacaciones fiesta "
+    "cumpleaños regalo torta musica concierto entrada precio plata pago "
+    "casa familia mama papa hermano perro gato auto bus trafico lluvia frio"
+).split()
+SYLLABLES = (
+    "ba be bi bo bu ca ce ci co cu da de di do du fa fe fi fo ga go gu la le "
+    "li lo lu ma me mi mo mu na ne ni no nu pa pe pi po pu ra re ri ro ru sa "
+    "se si so su ta te ti to tu va ve vi vo za zo"
+).split()
+FILLERS = (
+    "jaja jajaja jsjs xd ya ok que pues bueno si no oye osea dale listo "
+    "gracias hola chau causa pe nomas igual tipo mrd"
+).split()
+EMOJIS = ["😂", "🤣", "😅", "😍", "👍", "🙏", "🔥", "🎉", "😢", "😡", "🤔", "👀", "❤️", "✨"]
+MEDIA = [
+    "<Multimedia omitido>",
+    "STK-{date}-WA{n:04d}.webp (archivo adjunto)",
+    "IMG-{date}-WA{n:04d}.jpg (archivo adjunto)",
+    "https://www.youtube.com/watch?v={n:011d}",
+    "<Se editó este mensaje.>",
+    "Se eliminó este mensaje.",
+]
+SYSTEM = [
+    "{user} añadió a {other}",
+    "{user} salió del grupo",
+    "{user} cambió el asunto del grupo",
+    "Los mensajes y las llamadas están cifrados de extremo a extremo.",
+]
+
+
+def make_vocabulary(size, rng):
+    # Palabras base y, si hacen falta mas, pseudo-palabras de 2 a 4 silabas
+    words = list(dict.fromkeys(BASE_WORDS))[:size]
+    seen = set(words) | set(FILLERS)
+    while len(words) < size:
+        word = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+    return words
+
+
+def zipf_weights(n, exponent=1.1):
+    total = 0.0
+    weights = []
+    for rank in range(1, n + 1):
+        total += 1 / rank ** exponent
+        weights.append(total)
+    return weights
+
+
+class ChatGenerator:
+    def __init__(
+        self,
+        users=20,
+        vocabulary=5000,
+        topics=8,
+        media_ratio=0.05,
+        emoji_ratio=0.1,
+        multiline_ratio=0.02,
+        repeat_ratio=0.03,
+        system_ratio=0.002,
+        start=datetime(2022, 1, 1),
+        seed=42
+    ):
+        self.rng = random.Random(seed)
+        self.media_ratio = media_ratio
+        self.emoji_ratio = emoji_ratio
+        self.multiline_ratio = multiline_ratio
+        self.repeat_ratio = repeat_ratio
+        self.system_ratio = system_ratio
+        self.time = start
+
+        self.users = [f"519{self.rng.randrange(10 ** 8):08d}" for _ in range(users)]
+        # Pocos usuarios escriben la mayoria de los mensajes
+        self.user_weights = zipf_weights(users)
+
+        # Cada tema usa su propia porcion del vocabulario, con algo de solape
+        words = make_vocabulary(vocabulary, self.rng)
+        topic_size = max(10, 2 * len(words) // max(topics, 1))
+        self.topics = []
+        for _ in range(topics):
+            topic_words = self.rng.sample(words, min(topic_size, len(words)))
+            self.topics.append((topic_words, zipf_weights(len(topic_words))))
+
+        # Cadenas largas que se reenvian tal cual (o casi)
+        self.chains = [self._sentence(20, 40) for _ in range(5)]
+
+    def _sentence(self, low=1, high=15):
+        words, weights = self.rng.choice(self.topics)
+        count = min(self.rng.randint(low, high), self.rng.randint(low, high))
+        tokens = self.rng.choices(words, cum_weights=weights, k=count)
+        for _ in range(self.rng.randint(0, 2)):
+            tokens.insert(self.rng.randint(0, len(tokens)), self.rng.choice(FILLERS))
+        return " ".join(tokens)
+
+    def _emojis(self):
+        return "".join(self.rng.choices(EMOJIS, k=self.rng.randint(1, 3)))
+
+    def _text(self, n):
+        rng = self.rng
+        roll = rng.random()
+        if roll < self.media_ratio:
+            return rng.choice(MEDIA).format(date=self.time.strftime("%Y%m%d"), n=n % 10000)
+        roll -= self.media_ratio
+        if roll < self.repeat_ratio:
+            chain = rng.choice(self.chains)
+            return chain if rng.random() < 0.7 else chain + " " + rng.choice(FILLERS)
+
+        text = self._sentence()
+        if rng.random() < self.emoji_ratio:
+            # A veces solo emojis, a veces al final del texto
+            text = self._emojis() if rng.random() < 0.3 else f"{text} {self._emojis()}"
+        if rng.random() < self.multiline_ratio:
+            text += "".join("\n" + self._sentence() for _ in range(rng.randint(1, 3)))
+        return text
+
+    def lines(self, n_messages):
+        rng = self.rng
+        for n in range(n_messages):
+            # Rafagas de mensajes seguidos y pausas largas de vez en cuando
+            gap = rng.expovariate(1 / 30) if rng.random() < 0.9 else rng.expovariate(1 / 3600)
+            self.time += timedelta(seconds=gap)
+            header = self.time.strftime("%d/%m/%y, %H:%M")
+            user = rng.choices(self.users, cum_weights=self.user_weights)[0]
+
+            if rng.random() < self.system_ratio:
+                yield f"{header} - " + rng.choice(SYSTEM).format(
+                    user=user, other=rng.choice(self.users)
+                )
+            yield f"{header} - {user}: {self._text(n)}"
+
+
+def generate_chat(path, messages, **options):
+    with open(path, "w", encoding="utf-8") as f:
+        for line in ChatGenerator(**options).lines(messages):
+            f.write(line)
+            f.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("output")
+    parser.add_argument("--messages", type=int, default=10000)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--vocabulary", type=int, default=5000)
+    parser.add_argument("--topics", type=int, default=8)
+    parser.add_argument("--media-ratio", type=float, default=0.05)
+    parser.add_argument("--emoji-ratio", type=float, default=0.1)
+    parser.add_argument("--multiline-ratio", type=float, default=0.02)
+    parser.add_argument("--repeat-ratio", type=float, default=0.03)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    generate_chat(
+        args.output,
+        args.messages,
+        users=args.users,
+        vocabulary=args.vocabulary,
+        topics=args.topics,
+        media_ratio=args.media_ratio,
+        emoji_ratio=args.emoji_ratio,
+        multiline_ratio=args.multiline_ratio,
+        repeat_ratio=args.repeat_ratio,
+        seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    main()
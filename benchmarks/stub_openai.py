@@ -0,0 +1,40 @@
+"""Servidor local que imita /v1/chat/completions de OpenAI, para probar los resumenes.
+
+Uso:
+    python benchmarks/stub_openai.py --port 8001 --latency 0.5 --fail-rate 0.2
+    python benchmarks/stub_openai.py --fail-first 3 --fail-status 503 --retry-after 1
+    OPENAI_BASE_URL=http://localhost:8001/v1 python src/main.py
+"""
+import argparse
+import os
+import sys
+from http.server import ThreadingHTTPServer
+
+# El servidor vive con las pruebas; aqui solo se configura desde la linea de comandos
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "tests"))
+
+from stub_openai import StubHandler  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--fail-first", type=int, default=0)
+    parser.add_argument("--fail-status", type=int, default=429)
+    parser.add_argument("--retry-after", type=float, default=0.1)
+    args = parser.parse_args()
+
+    StubHandler.latency = args.latency
+    StubHandler.fail_rate = args.fail_rate
+    StubHandler.fail_first = args.fail_first
+    StubHandler.fail_status = args.fail_status
+    StubHandler.retry_after = args.retry_after
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), StubHandler)
+    print(f"Stub OpenAI en http://127.0.0.1:{args.port}/v1")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,69 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     openai_api_key: str = "AQUI_INSERTAR_EL_API_KEY"
+    # Resumenes: endpoint compatible con OpenAI (opcional, p.ej. un servidor local de prueba)
+    openai_base_url: Optional[str] = None
+    summary_model: str = "gpt-3.5-turbo-16k"
+    # Pedidos simultaneos, limites por minuto (0 o None = sin limite) y reintentos
+    summary_concurrency: int = 4
+    summary_requests_per_minute: Optional[int] = 60
+    summary_tokens_per_minute: Optional[int] = None
+    summary_max_retries: int = 5
+    summary_timeout: float = 60.0
+    # Tokens estimados para los mensajes de cada prompt (los mas representativos)
+    summary_prompt_tokens: int = 1500
+    # Cache de resumenes por hash del prompt (None la desactiva)
+    summary_cache_dir: Optional[str] = "cache_resumenes"
+    summary_cache_max_bytes: int = 64 * 1024 * 1024
+    summary_cache_ttl: int = 30 * 24 * 3600
+    # Mensajes por lote al leer el chat (limita la memoria de la carga)
+    load_chunk_size: int = 10000
+    # Procesos para tokenizar y lematizar (1 = sin pool)
+    preprocess_workers: int = 1
+    preprocess_chunk_size: int = 2000
+    # Entradas de la cache LRU de lemas y de mensajes ya procesados
+    lemma_cache_size: int = 100000
+    message_cache_size: int = 100000
+    # Colapsar mensajes repetidos antes de ajustar; similitud minima para los
+    # casi iguales (None = solo iguales exactos)
+    dedup_messages: bool = True
+    dedup_near_threshold: Optional[float] = 0.8
+    # Recursos de NLTK: descargar los que falten (False: solo se verifican
+    # en disco, sin red) y precargarlos en segundo plano al iniciar
+    nltk_download: bool = True
+    warm_up_on_startup: bool = True
+    # Archivo JSON con stop words y parametros del vectorizador (opcional)
+    vectorizer_config_path: Optional[str] = None
+    # Analisis en segundo plano: hilos, cola de espera y vida del resultado
+    job_workers: int = 2
+    job_queue_size: int = 10
+    job_result_ttl: int = 3600
+    job_retry_after: int = 30
+    # Por encima de este tamaño /analyze pide usar /jobs
+    sync_max_upload_bytes: int = 20 * 1024 * 1024
+    # Cache de resultados en disco (None la desactiva)
+    result_cache_dir: Optional[str] = "cache_resultados"
+    result_cache_max_bytes: int = 512 * 1024 * 1024
+    result_cache_ttl: int = 24 * 3600
+    # Resultados ya leidos que se mantienen en memoria para paginar mensajes
+    result_page_cache_size: int = 8
+    # Modelos incrementales por chat (parametro chat_id)
+    topic_model_dir: str = "modelos_chat"
+    topic_model_features: int = 2 ** 18
+    topic_model_drift_threshold: float = 0.25
+    # Modelos guardados con save_model para /classify
+    artifact_dir: Optional[str] = "artefactos"
+    # Modelos cargados en memoria, y tamaño y espera (ms) de cada micro-lote
+    classify_cache_size: int = 4
+    classify_max_batch: int = 256
+    classify_batch_wait_ms: float = 0.0
+    # Nivel de los logs (incluye los tiempos de cada analisis)
+    log_level: str = "INFO"
+    # Permite pedir ?profile=true en /analyze (el perfil agrega costo)
+    profiling_enabled: bool = False
     
     class Config:
         env_file = ".env"
\ No newline at end of file
@@ -1,13 +1,39 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi import FastAPI, File, UploadFile, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, FileResponse, Response, StreamingResponse
 from typing import Optional
 import uvicorn
 import traceback
+import tempfile
+import shutil
 import os
+import logging
+import threading
+import time
+from datetime import datetime
 
+from starlette.concurrency import run_in_threadpool
+
+from services import metrics
 from services.chat_analyzer import ChatAnalyzer
-from services.chat_summarizer import ChatSummarizer
-from models.response_models import AnalysisResponse
+from services.chat_summarizer import ChatSummarizer, report_inputs, result_inputs
+from services.report_builder import build_cluster_reports, iter_report_files
+from services.result_cache import ResultCache, hash_stream
+from services.json_stream import (
+    JsonEncoder,
+    NdjsonEncoder,
+    iter_cached_json,
+    iter_encoded,
+    read_messages,
+    topics_from_index,
+    topics_from_reports,
+)
+from services.lru_cache import LRUCache
+from services.artifact_store import ArtifactStore
+from services.micro_batcher import BatcherClosedError, MicroBatcher
+from services.zip_stream import iter_zip
+from services.incremental_model import INCREMENTAL_METHODS, IncrementalTopicModel, TopicModelStore
+from services.job_queue import JobManager, JobManagerClosedError, QueueFullError
+from models.response_models import AnalysisResponse, ClassifyRequest
 from config.settings import Settings
 
 app = FastAPI(
@@ -16,54 +42,738 @@ app = FastAPI(
 )
 
 settings = Settings()
-chat_analyzer = ChatAnalyzer()
-chat_summarizer = ChatSummarizer(settings.openai_api_key)
+logging.basicConfig(level=settings.log_level)
+logger = logging.getLogger(__name__)
+
+chat_analyzer = ChatAnalyzer(
+    chunk_size=settings.load_chunk_size,
+    preprocess_workers=settings.preprocess_workers,
+    preprocess_chunk_size=settings.preprocess_chunk_size,
+    lemma_cache_size=settings.lemma_cache_size,
+    message_cache_size=settings.message_cache_size,
+    vectorizer_config_path=settings.vectorizer_config_path,
+    artifact_dir=settings.artifact_dir,
+    dedup=settings.dedup_messages,
+    near_duplicate_threshold=settings.dedup_near_threshold,
+    download_resources=settings.nltk_download
+)
+
+summary_cache = None
+if settings.summary_cache_dir:
+    summary_cache = ResultCache(
+        settings.summary_cache_dir,
+        max_bytes=settings.summary_cache_max_bytes,
+        ttl=settings.summary_cache_ttl
+    )
+
+chat_summarizer = ChatSummarizer(
+    settings.openai_api_key,
+    base_url=settings.openai_base_url,
+    model=settings.summary_model,
+    max_concurrency=settings.summary_concurrency,
+    requests_per_minute=settings.summary_requests_per_minute,
+    tokens_per_minute=settings.summary_tokens_per_minute,
+    max_retries=settings.summary_max_retries,
+    timeout=settings.summary_timeout,
+    prompt_token_budget=settings.summary_prompt_tokens,
+    cache=summary_cache
+)
+
+job_manager = JobManager(
+    max_workers=settings.job_workers,
+    max_queue=settings.job_queue_size,
+    result_ttl=settings.job_result_ttl,
+    on_discard=lambda job: _discard_job(job)
+)
+
+result_cache = None
+if settings.result_cache_dir:
+    result_cache = ResultCache(
+        settings.result_cache_dir,
+        max_bytes=settings.result_cache_max_bytes,
+        ttl=settings.result_cache_ttl
+    )
+
+# Resultados ya parseados para paginar mensajes sin releer el disco
+result_pages = LRUCache(settings.result_page_cache_size)
+
+topic_store = TopicModelStore(settings.topic_model_dir)
+
+# Modelos guardados ya cargados para /classify: (nombre, version) -> (clasificador, lote)
+classifiers = LRUCache(
+    settings.classify_cache_size,
+    on_evict=lambda key, entry: entry[1].close()
+)
+# Un solo pedido carga cada modelo; los demas esperan y usan esa entrada
+# (dos modelos pueden compartir lock)
+classifier_locks = [threading.Lock() for _ in range(16)]
+
+# Las caches en memoria llevan sus propios contadores; /metrics los copia
+metrics.REGISTRY.describe("chat_cache_hits_total", "counter", "Aciertos por cache en memoria")
+metrics.REGISTRY.describe("chat_cache_misses_total", "counter", "Fallos por cache en memoria")
+metrics.REGISTRY.describe(
+    "http_request_seconds", "histogram", "Duracion de cada pedido hasta enviar el ultimo byte"
+)
+
+RESPONSE_FORMATS = {
+    "json": "application/json",
+    "json_stream": "application/json",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _cluster(df, method, n_groups, chat_id=None, time_budget=None, save_model=None):
+    if chat_id is None:
+        df_processed, keywords = chat_analyzer.cluster_messages(
+            df, method, n_groups, time_budget, save_as=save_model
+        )
+        return df_processed, keywords, None
+
+    # Modelo persistente del chat: solo aprende de los mensajes nuevos
+    with topic_store.lock(chat_id):
+        model = topic_store.load(chat_id)
+        if model is None or not model.matches(
+            chat_analyzer.vectorizer_config, method, n_groups, settings.topic_model_features
+        ):
+            model = IncrementalTopicModel(
+                chat_id,
+                chat_analyzer.vectorizer_config,
+                method=method,
+                n_groups=n_groups,
+                n_features=settings.topic_model_features,
+                drift_threshold=settings.topic_model_drift_threshold
+            )
+        df_processed, keywords, info = chat_analyzer.update_topic_model(df, model)
+        topic_store.save(model)
+    return df_processed, keywords, info
+
+
+def _run_analysis(
+    source, method, n_groups=5, progress=None, chat_id=None, time_budget=None,
+    save_model=None
+):
+    progress = progress or (lambda stage, fraction: None)
+
+    progress("load", 0.0)
+    df = chat_analyzer.load_chat(source)
+
+    progress("cluster", 0.5)
+    df_processed, keywords, model_info = _cluster(
+        df, method, n_groups, chat_id, time_budget, save_model
+    )
+
+    progress("response", 0.9)
+    meta = {"status": "success"}
+    if model_info is not None:
+        meta["model"] = model_info
+    if "clustering" in df_processed.attrs:
+        meta["clustering"] = df_processed.attrs["clustering"]
+    with metrics.stage("build_reports"):
+        reports = build_cluster_reports(df_processed, keywords)
+    return meta, reports
+
+
+def _analysis(
+    source, method, n_groups=5, progress=None, chat_id=None, time_budget=None,
+    save_model=None
+):
+    # Devuelve ((indice, archivo) en cache, meta, reportes, clave); si hay
+    # acierto solo lo primero
+    key = None
+    # Con chat_id el resultado depende del estado del modelo, no solo del archivo;
+    # con save_model hace falta ajustar el modelo para guardarlo
+    if result_cache is not None and chat_id is None and save_model is None:
+        with metrics.stage("hash_upload"):
+            content_hash = hash_stream(source)
+        # El presupuesto solo cambia el resultado cuando elige el motor (auto)
+        key = ResultCache.make_key(
+            content_hash, chat_analyzer.config_fingerprint,
+            method, n_groups, time_budget if method == "auto" else None,
+            settings.dedup_messages, settings.dedup_near_threshold
+        )
+        cached = result_cache.open(key)
+        if cached is not None:
+            metrics.count("result_cache_hits")
+            return cached, None, None, key
+        metrics.count("result_cache_misses")
+
+    meta, reports = _run_analysis(
+        source, method, n_groups, progress, chat_id, time_budget, save_model
+    )
+    if key is not None:
+        # El id permite paginar los mensajes luego desde la cache
+        meta["result_id"] = key
+    return None, meta, reports, key
+
+
+def _iter_result(encoder, meta, reports, key, include_messages=True):
+    # Una sola pasada: cada mensaje se serializa una vez y esos bytes van a la
+    # respuesta y al JSON de la cache, que se guarda al terminar de enviarla
+    if key is None:
+        yield from iter_encoded(encoder, topics_from_reports(reports, include_messages))
+        return
+    index = {}
+    with result_cache.writer(key, index) as cache_file:
+        yield from iter_encoded(
+            encoder, topics_from_reports(reports),
+            copy=(JsonEncoder(meta, index=index), cache_file.write)
+        )
+
+
+def _iter_cached(cached, encoder, include_messages=True):
+    # Acierto: los temas salen del indice y los mensajes se leen por bloques
+    index, file = cached
+    with file:
+        if include_messages and isinstance(encoder, JsonEncoder):
+            yield from iter_cached_json(encoder.meta, index, file)
+        else:
+            yield from iter_encoded(encoder, topics_from_index(index, file, include_messages))
+
+
+def _spool_result(meta, reports):
+    # Sin cache el JSON del trabajo queda en un archivo temporal hasta que el
+    # trabajo expira; /jobs/{id}/result lo envia desde ahi
+    fd, path = tempfile.mkstemp(prefix="trabajo_", suffix=".json")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in iter_encoded(JsonEncoder(meta), topics_from_reports(reports)):
+                f.write(chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+
+def _job_analysis(*args, **kwargs):
+    # Corre en el hilo del trabajo: ahi se fija su propio registro de tiempos.
+    # El resultado va al disco (cache o archivo temporal); el trabajo solo
+    # guarda como encontrarlo
+    spool_path = None
+    with metrics.collect() as timings:
+        cached, meta, reports, key = _analysis(*args, **kwargs)
+        if cached is not None:
+            cached[1].close()
+        else:
+            with metrics.stage("encode"):
+                if key is not None:
+                    index = {}
+                    result_cache.put_stream(
+                        key,
+                        iter_encoded(JsonEncoder(meta, index=index), topics_from_reports(reports)),
+                        index
+                    )
+                else:
+                    spool_path = _spool_result(meta, reports)
+    logger.info("Trabajo terminado: %s", timings.to_dict())
+    return cached is not None, key, timings.to_dict(), spool_path
+
+
+def _discard_job(job):
+    spool_path = job.result[3]
+    if spool_path is not None:
+        try:
+            os.remove(spool_path)
+        except FileNotFoundError:
+            pass
+
+
+def _iter_file(file, block_size=1 << 20):
+    with file:
+        while block := file.read(block_size):
+            yield block
+
+
+def _profiled(function, *args, **kwargs):
+    # El perfil se toma en el hilo donde corre el analisis
+    with metrics.Profile() as profile:
+        result = function(*args, **kwargs)
+    return result, profile
+
+
+def _load_page(result_id, topic, offset, limit):
+    # Solo se parsean los bloques de mensajes que caen en la pagina
+    if result_cache is None:
+        return None
+    index = result_pages.get(result_id)
+    file = result_cache.open_file(result_id) if index is not None else None
+    if file is None:
+        cached = result_cache.open(result_id)
+        if cached is None:
+            return None
+        index, file = cached
+        result_pages.put(result_id, index)
+    with file:
+        for data in index["topics"]:
+            if data["topic"] == topic:
+                positions = range(offset, min(offset + limit, data["message_count"]))
+                records = read_messages(file, data, positions)
+                return data["message_count"], [records[position] for position in positions]
+    return None, None
+
+
+def _cache_headers(hit, key):
+    if key is None:
+        return {}
+    return {"X-Cache": "HIT" if hit else "MISS", "X-Cache-Key": key}
+
+
+def _upload_size(file: UploadFile):
+    if file.size is not None:
+        return file.size
+    file.file.seek(0, os.SEEK_END)
+    size = file.file.tell()
+    file.file.seek(0)
+    return size
+
+
+def _copy_upload(file: UploadFile):
+    # Los trabajos viven mas que la peticion: copia anonima, sin nombre en disco
+    spool = tempfile.TemporaryFile()
+    file.file.seek(0)
+    shutil.copyfileobj(file.file, spool)
+    spool.seek(0)
+    return spool
+
+
+def _error(status_code, message, headers=None):
+    return HTTPException(
+        status_code=status_code,
+        detail={
+            "status": "error",
+            "message": message
+        },
+        headers=headers
+    )
+
+
+def _validate_chat_id(chat_id, method):
+    if chat_id is None:
+        return
+    try:
+        TopicModelStore.validate_chat_id(chat_id)
+    except ValueError as e:
+        raise _error(400, str(e))
+    if method not in INCREMENTAL_METHODS:
+        raise _error(
+            400,
+            f"Con chat_id solo se admite method {' o '.join(INCREMENTAL_METHODS)}: {method}"
+        )
+
+
+def _validate_save_model(save_model, chat_id):
+    if save_model is None:
+        return
+    if chat_analyzer.artifact_store is None:
+        raise _error(400, "No hay un directorio de artefactos configurado")
+    if chat_id is not None:
+        raise _error(400, "save_model no se puede usar junto con chat_id")
+    try:
+        ArtifactStore.validate_name(save_model)
+    except ValueError as e:
+        raise _error(400, str(e))
+
+
+def _load_classifier(name, version):
+    # scipy.special y scipy.sparse se cargan con el primer modelo, no al inicio
+    from services.topic_classifier import TopicClassifier
+
+    key = (name, version)
+    with classifier_locks[hash(key) % len(classifier_locks)]:
+        # Otro pedido pudo cargarlo mientras se esperaba el lock
+        entry = classifiers.get(key)
+        if entry is not None:
+            return entry
+
+        loaded = chat_analyzer.artifact_store.load(name, version)
+        if loaded is None:
+            return None
+        meta, vectorizer, model = loaded
+        if meta["config_fingerprint"] != chat_analyzer.config_fingerprint:
+            raise _error(409, "El modelo se guardó con otro preprocesamiento; vuelva a generarlo")
+
+        classifier = TopicClassifier(meta, vectorizer, model, chat_analyzer.preprocess_texts)
+        batcher = MicroBatcher(
+            classifier.classify,
+            max_batch=settings.classify_max_batch,
+            max_wait=settings.classify_batch_wait_ms / 1000
+        )
+        classifiers.put(key, (classifier, batcher))
+    return classifier, batcher
+
 
 #Aqui empieza el endpoint para analizar
 @app.post("/analyze")
 async def analyze_chat(
     file: UploadFile = File(...),
     method: Optional[str] = "lda",
-    format: Optional[str] = "json"
+    n_groups: int = Query(5, ge=1),
+    chat_id: Optional[str] = None,
+    time_budget: Optional[float] = Query(None, gt=0),
+    format: Optional[str] = "json",
+    include_messages: Optional[bool] = True,
+    generate_summary: Optional[bool] = False,
+    save_model: Optional[str] = None,
+    timings: Optional[bool] = False,
+    profile: Optional[bool] = False
 ):
     try:
-        content = await file.read()
-        temp_file_path = f"temp_{file.filename}"
-        
-        with open(temp_file_path, "wb") as f:
-            f.write(content)
-
-        # Analizar el chat
-        df = chat_analyzer.load_chat(temp_file_path)
-        df_processed, keywords = chat_analyzer.cluster_messages(df, method)
-        
-        # Preparar respuesta JSON
-        topics = {}
-        for cluster in df_processed["cluster"].unique():
-            df_cluster = df_processed[df_processed["cluster"] == cluster]
-            topics[int(cluster)] = {
-                "keywords": keywords[cluster][:10],
-                "message_count": len(df_cluster),
-                "messages": df_cluster[["fecha", "hora", "usuario", "mensaje_original"]]
-                    .to_dict("records")
-            }
+        if format not in RESPONSE_FORMATS:
+            raise _error(400, f"Formato no soportado: {format}")
+        if profile and not settings.profiling_enabled:
+            raise _error(400, "El perfilado está desactivado (PROFILING_ENABLED)")
+        _validate_chat_id(chat_id, method)
+        _validate_save_model(save_model, chat_id)
+        if _upload_size(file) > settings.sync_max_upload_bytes:
+            raise _error(
+                413,
+                "Archivo demasiado grande para el análisis directo, use POST /jobs"
+            )
 
-        return JSONResponse({
-            "status": "success",
-            "topics": topics
-        })
+        # Se lee directo del spool de la subida, en un hilo para no
+        # bloquear el event loop
+        file.file.seek(0)
+        # El hilo del threadpool recibe una copia del contexto con estos tiempos
+        with metrics.collect() as request_timings:
+            if profile:
+                (cached, meta, reports, key), profiler = await run_in_threadpool(
+                    _profiled, _analysis, file.file, method, n_groups,
+                    chat_id=chat_id, time_budget=time_budget, save_model=save_model
+                )
+            else:
+                cached, meta, reports, key = await run_in_threadpool(
+                    _analysis, file.file, method, n_groups,
+                    chat_id=chat_id, time_budget=time_budget, save_model=save_model
+                )
+        headers = _cache_headers(cached is not None, key)
+        logger.info("Análisis terminado: %s", request_timings.to_dict())
 
+        # Lo que se agrega a la respuesta no se guarda en la cache
+        response_meta = dict(cached[0]["meta"] if cached is not None else meta)
+        if timings:
+            response_meta["timings"] = request_timings.to_dict()
+        if profile:
+            response_meta["profile"] = profiler.to_dict()
+        if generate_summary:
+            if cached is not None:
+                inputs = await run_in_threadpool(result_inputs, *cached)
+            else:
+                inputs = report_inputs(reports)
+            response_meta["summaries"] = await chat_summarizer.summarize_topics(inputs)
+
+        encoder_class = NdjsonEncoder if format == "ndjson" else JsonEncoder
+        encoder = encoder_class(response_meta, include_messages)
+        if cached is not None:
+            chunks = _iter_cached(cached, encoder, include_messages)
+        else:
+            chunks = _iter_result(encoder, meta, reports, key, include_messages)
+        if format == "json":
+            return Response(
+                await run_in_threadpool(b"".join, chunks),
+                media_type="application/json",
+                headers=headers
+            )
+        # Se serializa a medida que se envia, un tema y un bloque de mensajes a la vez
+        return StreamingResponse(
+            chunks,
+            media_type=RESPONSE_FORMATS[format],
+            headers=headers
+        )
+
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail={
-                "status": "error",
-                "message": str(e)
+        raise _error(500, str(e))
+
+
+@app.post("/analyze/export")
+async def export_chat(
+    file: UploadFile = File(...),
+    method: Optional[str] = "lda",
+    n_groups: int = Query(5, ge=1),
+    chat_id: Optional[str] = None,
+    time_budget: Optional[float] = Query(None, gt=0),
+    compression_level: int = Query(6, ge=0, le=9)
+):
+    try:
+        _validate_chat_id(chat_id, method)
+        if _upload_size(file) > settings.sync_max_upload_bytes:
+            raise _error(
+                413,
+                "Archivo demasiado grande para el análisis directo, use POST /jobs"
+            )
+
+        file.file.seek(0)
+        _, reports = await run_in_threadpool(
+            _run_analysis, file.file, method, n_groups,
+            chat_id=chat_id, time_budget=time_budget
+        )
+
+        # Los tema_N.txt y el resumen se comprimen mientras se envian
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return StreamingResponse(
+            iter_zip(iter_report_files(reports), compression_level),
+            media_type="application/zip",
+            headers={
+                "Content-Disposition": f'attachment; filename="resultados_chat_{timestamp}.zip"'
             }
         )
-    finally:
-        if os.path.exists(temp_file_path):
-            os.remove(temp_file_path)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise _error(500, str(e))
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job(
+    file: UploadFile = File(...),
+    method: Optional[str] = "lda",
+    n_groups: int = Query(5, ge=1),
+    chat_id: Optional[str] = None,
+    time_budget: Optional[float] = Query(None, gt=0),
+    save_model: Optional[str] = None
+):
+    _validate_chat_id(chat_id, method)
+    _validate_save_model(save_model, chat_id)
+    spool = await run_in_threadpool(_copy_upload, file)
+    try:
+        job = job_manager.submit(
+            _job_analysis, spool, method, n_groups,
+            chat_id=chat_id, time_budget=time_budget, save_model=save_model,
+            cleanup=spool.close
+        )
+    except QueueFullError as e:
+        spool.close()
+        raise _error(429, str(e), headers={"Retry-After": str(settings.job_retry_after)})
+    except JobManagerClosedError as e:
+        spool.close()
+        raise _error(503, str(e), headers={"Retry-After": str(settings.job_retry_after)})
+
+    return JSONResponse(
+        {"status": "success", "job": job.to_dict()},
+        status_code=202
+    )
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise _error(404, "Trabajo no encontrado")
+    data = {"status": "success", "job": job.to_dict()}
+    if job.state == "done":
+        data["timings"] = job.result[2]
+    return JSONResponse(data)
+
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise _error(404, "Trabajo no encontrado")
+    if job.state == "error":
+        raise _error(500, job.error)
+    if job.state != "done":
+        raise _error(409, "El trabajo todavía no termina")
+    hit, key, _, spool_path = job.result
+    # Se envia por bloques desde el disco, sin armar el JSON en memoria
+    if spool_path is not None:
+        try:
+            chunks = _iter_file(open(spool_path, "rb"))
+        except FileNotFoundError:
+            chunks = None
+    else:
+        cached = result_cache.open(key) if result_cache is not None else None
+        chunks = _iter_cached(cached, JsonEncoder(cached[0]["meta"])) if cached is not None else None
+    if chunks is None:
+        raise _error(410, "El resultado ya no está disponible, vuelva a enviar el trabajo")
+    return StreamingResponse(
+        chunks,
+        media_type="application/json",
+        headers=_cache_headers(hit, key)
+    )
+
+
+@app.post("/classify")
+async def classify_message(request: ClassifyRequest):
+    store = chat_analyzer.artifact_store
+    try:
+        ArtifactStore.validate_name(request.model)
+    except ValueError as e:
+        raise _error(400, str(e))
+
+    version = request.version
+    if version is None and store is not None:
+        version = store.latest_version(request.model)
+    if store is None or version is None:
+        raise _error(404, "Modelo no encontrado")
+
+    # El modelo queda cargado; solo el primer pedido lo lee del disco
+    entry = classifiers.get((request.model, version))
+    if entry is None:
+        entry = await run_in_threadpool(_load_classifier, request.model, version)
+        if entry is None:
+            raise _error(404, "Modelo no encontrado")
+
+    # Los pedidos concurrentes se clasifican juntos en una sola transformacion
+    try:
+        result = await entry[1].submit(request.message)
+    except BatcherClosedError:
+        # Se desalojo de la cache justo ahora: se vuelve a cargar
+        entry = await run_in_threadpool(_load_classifier, request.model, version)
+        if entry is None:
+            raise _error(404, "Modelo no encontrado")
+        result = await entry[1].submit(request.message)
+    return JSONResponse({
+        "status": "success",
+        "model": request.model,
+        "version": version,
+        **result
+    })
+
+
+@app.get("/results/{result_id}/topics/{topic}/messages")
+async def get_topic_messages(
+    result_id: str,
+    topic: int,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000)
+):
+    page = await run_in_threadpool(_load_page, result_id, topic, offset, limit)
+    if page is None:
+        raise _error(404, "Resultado no encontrado")
+    total, messages = page
+    if total is None:
+        raise _error(404, "Tema no encontrado")
+    return JSONResponse({
+        "status": "success",
+        "result_id": result_id,
+        "topic": topic,
+        "offset": offset,
+        "limit": limit,
+        "total": total,
+        "messages": messages
+    })
+
+
+@app.delete("/cache/{key}")
+async def invalidate_cache_entry(key: str):
+    result_pages.clear()
+    if result_cache is None or not result_cache.invalidate(key):
+        raise _error(404, "Entrada de cache no encontrada")
+    return JSONResponse({"status": "success", "removed": 1})
+
+
+@app.delete("/cache")
+async def clear_cache():
+    result_pages.clear()
+    removed = result_cache.clear() if result_cache is not None else 0
+    return JSONResponse({"status": "success", "removed": removed})
+
+
+def _warm_up():
+    try:
+        chat_analyzer.warm_up()
+        logger.info("Recursos precargados en %.2f s", chat_analyzer.warm_up_seconds)
+    except Exception:
+        # Ya quedo en el log; /ready informa el error y el primer analisis reintenta
+        pass
+
+
+@app.on_event("startup")
+def start_warm_up():
+    # El servidor acepta conexiones enseguida; NLTK, WordNet y sklearn se
+    # cargan en segundo plano y /ready avisa cuando terminan
+    if settings.warm_up_on_startup:
+        threading.Thread(target=_warm_up, name="warm-up", daemon=True).start()
+
+
+@app.get("/ready")
+async def ready():
+    if settings.warm_up_on_startup and not chat_analyzer.ready.is_set():
+        raise _error(
+            503,
+            chat_analyzer.warm_up_error or "Cargando recursos",
+            headers={"Retry-After": "1"}
+        )
+    return JSONResponse({
+        "status": "success",
+        "ready": True,
+        "warm_up_seconds": chat_analyzer.warm_up_seconds
+    })
+
+
+@app.on_event("shutdown")
+def shutdown_jobs():
+    job_manager.shutdown()
+
+
+@app.on_event("shutdown")
+async def shutdown_summarizer():
+    await chat_summarizer.aclose()
+
+
+@app.get("/stats")
+async def get_stats():
+    return JSONResponse({
+        "status": "success",
+        "cache": chat_analyzer.cache_info()
+    })
+
+
+def _observe_request(request, status, start):
+    # Ruta declarada (/jobs/{job_id}), no la URL: evita una serie por id
+    route = request.scope.get("route")
+    path = route.path if route is not None else "unmatched"
+    metrics.REGISTRY.inc(
+        "http_requests_total", method=request.method, path=path, status=status
+    )
+    metrics.REGISTRY.observe(
+        "http_request_seconds", time.perf_counter() - start,
+        method=request.method, path=path
+    )
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    except Exception:
+        _observe_request(request, 500, start)
+        raise
+
+    # El cuerpo (ndjson, json_stream, ZIP) se genera mientras se envia: la
+    # duracion se mide al terminar de enviarlo, no al salir los encabezados
+    body = response.body_iterator
+
+    async def timed_body():
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            _observe_request(request, response.status_code, start)
+
+    response.body_iterator = timed_body()
+    return response
+
+
+@app.get("/metrics")
+async def get_metrics():
+    registry = metrics.REGISTRY
+    registry.set("process_resident_memory_bytes", metrics.current_rss_bytes())
+    registry.set("process_peak_resident_memory_bytes", metrics.peak_rss_bytes())
+    registry.set("chat_jobs_queued", job_manager.queued_count())
+
+    caches = dict(chat_analyzer.cache_info())
+    caches["result_pages"] = result_pages.stats()
+    caches["classifiers"] = classifiers.stats()
+    for name, stats in caches.items():
+        registry.set("chat_cache_hits_total", stats["hits"], cache=name)
+        registry.set("chat_cache_misses_total", stats["misses"], cache=name)
+        registry.set("chat_cache_entries", stats["size"], cache=name)
+
+    return Response(registry.render(), media_type="text/plain; version=0.0.4")
 
 if __name__ == "__main__":
     # Aqui se puede manejar el puerto y en host
@@ -4,4 +4,10 @@ from typing import Dict, Optional
 class AnalysisResponse(BaseModel):
     status: str
     results_directory: str
-    summaries: Optional[Dict[int, str]]
\ No newline at end of file
+    summaries: Optional[Dict[int, str]]
+
+
+class ClassifyRequest(BaseModel):
+    model: str
+    message: str
+    version: Optional[int] = None
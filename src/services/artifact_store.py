@@ -0,0 +1,84 @@
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+
+
+NAME_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,64}")
+VERSION_PATTERN = re.compile(r"v(\d+)")
+
+
+class ArtifactStore:
+    # <directorio>/<nombre>/v<N>/ con vectorizer.joblib, model.joblib y meta.json
+    def __init__(self, directory):
+        self.directory = directory
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def validate_name(name):
+        if not NAME_PATTERN.fullmatch(name):
+            raise ValueError(f"Nombre de modelo inválido: {name}")
+
+    def _model_dir(self, name):
+        self.validate_name(name)
+        return os.path.join(self.directory, name)
+
+    def versions(self, name):
+        try:
+            entries = os.listdir(self._model_dir(name))
+        except FileNotFoundError:
+            return []
+        return sorted(
+            int(match.group(1))
+            for match in map(VERSION_PATTERN.fullmatch, entries) if match
+        )
+
+    def latest_version(self, name):
+        versions = self.versions(name)
+        return versions[-1] if versions else None
+
+    def save(self, name, vectorizer, model, meta):
+        model_dir = self._model_dir(name)
+        os.makedirs(model_dir, exist_ok=True)
+        with self._lock:
+            lock = self._locks.setdefault(name, threading.Lock())
+
+        with lock:
+            version = (self.latest_version(name) or 0) + 1
+            meta = {**meta, "name": name, "version": version, "created_at": time.time()}
+
+            # Se arma en un directorio temporal y se publica con un rename
+            temp_dir = tempfile.mkdtemp(dir=model_dir, prefix=".tmp")
+            import joblib
+            try:
+                # Sin compresion para poder abrir los arreglos con mmap
+                joblib.dump(vectorizer, os.path.join(temp_dir, "vectorizer.joblib"))
+                joblib.dump(model, os.path.join(temp_dir, "model.joblib"))
+                with open(os.path.join(temp_dir, "meta.json"), "w", encoding="utf-8") as f:
+                    json.dump(meta, f, ensure_ascii=False)
+                os.replace(temp_dir, os.path.join(model_dir, f"v{version}"))
+            except Exception:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+                raise
+        return meta
+
+    def load(self, name, version=None):
+        if version is None:
+            version = self.latest_version(name)
+            if version is None:
+                return None
+        path = os.path.join(self._model_dir(name), f"v{int(version)}")
+        if not os.path.isdir(path):
+            return None
+
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        # Los arreglos grandes (idf, centroides, componentes) quedan mapeados
+        import joblib
+        vectorizer = joblib.load(os.path.join(path, "vectorizer.joblib"), mmap_mode="r")
+        model = joblib.load(os.path.join(path, "model.joblib"), mmap_mode="r")
+        return meta, vectorizer, model
@@ -1,191 +1,379 @@
 import pandas as pd
 import numpy as np
-import re
 import os
+import hashlib
+import importlib
+import json
+import logging
+import threading
+import time
 from datetime import datetime
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.cluster import KMeans
-from sklearn.decomposition import LatentDirichletAllocation
-from nltk.stem import WordNetLemmatizer
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-import nltk
-import zipfile
-import tempfile
-import shutil
+from functools import cached_property, lru_cache
+
+from services.chat_loader import (
+    DEFAULT_CHUNK_SIZE,
+    MESSAGE_PATTERN,
+    build_batch,
+    concat_batches,
+    iter_message_chunks,
+    iter_with_head,
+    open_lines,
+)
+from services.artifact_store import ArtifactStore
+from services.clustering import make_engine, vocabulary_limits
+from services.dedup import NEAR_DUPLICATE_THRESHOLD, collapse_duplicates
+from services import metrics
+from services.lru_cache import LRUCache
+from services.nltk_resources import ensure_resources
+from services.preprocessing import ParallelPreprocessor, preprocess_text
+from services.report_builder import (
+    build_cluster_reports,
+    iter_report_files,
+    render_summary,
+    render_topic_file,
+)
+from services.text_cleaner import MessageCleaner
+from services.vectorizer_config import VectorizerConfig
+from services.zip_stream import iter_zip
+
+
+logger = logging.getLogger(__name__)
+
+# Se importan al primer analisis; warm_up los adelanta
+WARM_UP_MODULES = (
+    "sklearn.cluster",
+    "sklearn.decomposition",
+    "sklearn.feature_extraction.text",
+    "sklearn.preprocessing",
+)
 
 
 class ChatAnalyzer:
-    def __init__(self):
-        # Initialize NLTK resources
-        nltk.download("wordnet", quiet=True)
-        nltk.download("omw-1.4", quiet=True)
-        nltk.download('punkt', quiet=True)
-        nltk.download('stopwords', quiet=True)
-        self.lemmatizer = WordNetLemmatizer()
-        
+    def __init__(
+        self,
+        chunk_size=DEFAULT_CHUNK_SIZE,
+        preprocess_workers=1,
+        preprocess_chunk_size=2000,
+        lemma_cache_size=100000,
+        message_cache_size=100000,
+        vectorizer_config_path=None,
+        artifact_dir=None,
+        dedup=True,
+        near_duplicate_threshold=NEAR_DUPLICATE_THRESHOLD,
+        download_resources=True
+    ):
+        # Sin NLTK ni sklearn aqui: se cargan en warm_up (en segundo plano
+        # desde el servidor) o al primer analisis
+        self.cleaner = MessageCleaner()
+        self.chunk_size = chunk_size
+        self.vectorizer_config_path = vectorizer_config_path
+        # False: los recursos de NLTK solo se verifican en disco, sin red
+        self.download_resources = download_resources
+
+        self.ready = threading.Event()
+        self.warm_up_seconds = None
+        self.warm_up_error = None
+        self._warm_up_lock = threading.Lock()
+
+        # Memoria compartida entre peticiones: los chats repiten mucho los
+        # mismos tokens y mensajes completos
+        self._lemmatize = lru_cache(maxsize=lemma_cache_size)(self._lemmatize_word)
+        self.message_cache = LRUCache(message_cache_size)
+
+        # Modelos ajustados que se guardan para clasificar mensajes nuevos
+        self.artifact_store = ArtifactStore(artifact_dir) if artifact_dir else None
+
+        # Mensajes repetidos (cadenas, spam) se ajustan una sola vez, con peso
+        self.dedup = dedup
+        self.near_duplicate_threshold = near_duplicate_threshold
+
+        # Con un solo worker se procesa en el mismo proceso
+        self.preprocessor = None
+        if preprocess_workers > 1:
+            self.preprocessor = ParallelPreprocessor(
+                preprocess_workers, preprocess_chunk_size, lemma_cache_size
+            )
+
+    @cached_property
+    def lemmatizer(self):
+        from nltk.stem import WordNetLemmatizer
+        return WordNetLemmatizer()
+
+    def _lemmatize_word(self, word):
+        return self.lemmatizer.lemmatize(word)
+
+    @cached_property
+    def vectorizer_config(self):
+        # Stop words y parametros del vectorizador, calculados una sola vez
+        return VectorizerConfig.load_or_build(self.vectorizer_config_path)
+
+    @cached_property
+    def config_fingerprint(self):
+        # Identifica la configuracion de preprocesamiento (claves de cache)
+        self.warm_up()
+        return hashlib.sha256(json.dumps([
+            self.cleaner.rules,
+            MESSAGE_PATTERN.pattern,
+            self.vectorizer_config.fingerprint,
+        ]).encode("utf-8")).hexdigest()[:16]
+
+    def warm_up(self):
+        # La primera llamada verifica los recursos y carga WordNet, las stop
+        # words y sklearn; las que llegan mientras tanto esperan a que termine
+        if self.ready.is_set():
+            return
+        with self._warm_up_lock:
+            if self.ready.is_set():
+                return
+            try:
+                start = time.perf_counter()
+                ensure_resources(self.download_resources)
+                self.vectorizer_config
+                # WordNet se lee del disco con la primera palabra
+                self.lemmatizer.lemmatize("mensaje")
+                for module in WARM_UP_MODULES:
+                    importlib.import_module(module)
+                self.warm_up_seconds = round(time.perf_counter() - start, 3)
+                self.warm_up_error = None
+                self.ready.set()
+            except Exception as e:
+                self.warm_up_error = str(e)
+                logger.exception("Error al precargar los recursos: %s", e)
+                raise Exception(f"Error al precargar los recursos: {str(e)}")
+
     def preprocess_text(self, text):
         if pd.isna(text):
             return ""
-            
-        text_clean = self.clean_message(text)
-        
-        tokens = word_tokenize(text_clean)
-        
-        lemmatized = [self.lemmatizer.lemmatize(token) for token in tokens]
-        
-        return ' '.join(lemmatized)
 
-    def clean_message(self, text):
-        if pd.isna(text):
-            return ""
+        processed = self.message_cache.get(text)
+        if processed is None:
+            processed = preprocess_text(text, self.cleaner, self._lemmatize)
+            self.message_cache.put(text, processed)
+        return processed
+
+    def preprocess_texts(self, texts):
+        self.warm_up()
+        if self.preprocessor is None or len(texts) < self.preprocessor.chunk_size:
+            return [self.preprocess_text(text) for text in texts]
+
+        # Solo se envian al pool los mensajes que no estan en memoria
+        results = [self.message_cache.get(text) for text in texts]
+        missing = list({
+            text: None for text, processed in zip(texts, results) if processed is None
+        })
+        if missing:
+            processed = dict(zip(missing, self.preprocessor.map(missing)))
+            for text, value in processed.items():
+                self.message_cache.put(text, value)
+            results = [
+                processed[text] if value is None else value
+                for text, value in zip(texts, results)
+            ]
+        return results
+
+    def cache_info(self):
+        lemmas = self._lemmatize.cache_info()
+        return {
+            "lemmas": {
+                "hits": lemmas.hits,
+                "misses": lemmas.misses,
+                "size": lemmas.currsize,
+                "maxsize": lemmas.maxsize,
+            },
+            "messages": self.message_cache.stats(),
+        }
+
+    def clear_caches(self):
+        # Lemas y mensajes ya procesados (p. ej. para medir desde cero)
+        self._lemmatize.cache_clear()
+        self.message_cache.clear()
 
-        text_clean = text.lower()
-        patterns = [
-            r"[\U0001F300-\U0001F9FF]",  # Emojis
-            r"\b(?:xd+|:v|v:|umu|uwu|:\'v|:\'\'v)\b",  # Emotes básicos
-            r"http[s]?://\S+",  # URLs
-            r"stk-\d+-wa\d+\.webp",  # Stickers
-            r"img-\d+-wa\d+\.jpg",  # Imágenes
-            r"<se editó este mensaje\.>",
-            r"<multimedia omitido>",
-            r"\bx\d+\b",
-            r"\(archivo adjunto\)",
-            r"zzz+",
-            r"se eliminó este mensaje\.",
-            r"\b(enlace|unir|unió|unido)\b",
-            r"(añadió|añadiste)\b",
-            r"\b(?:tmr|ctmr|ptm|ptmr|mrd|mrda|csm|ctm)\b",
-            r"\b(?:xd+|XD+|xD+|Xd+)\b",
-            r"\b(?:wtf|wdf|wtff|wdff)\b",
-            r"\b(?:ps|pe|pe\'|pex|pz|pue|pueh)\b",
-            r"\b(?:pls|plz|porfa)\b",
-            r"\b(?:ok|okk|okey|oki|okis)\b",
-            r"(?:\.{2,}|\?{2,}|\!{2,})",
-            
-            
-            #  r'[^\w\s]',
-            # r'\d+',
-            # r'\s+',
-        ]
-
-        for pattern in patterns:
-            text_clean = re.sub(pattern, "", text_clean)
-
-        return text_clean.strip()
-
-    def load_chat(self, file_path):
+    def clean_message(self, text):
+        return self.cleaner.clean(text)
+
+    def clean_messages(self, series):
+        return self.cleaner.clean_series(series)
+
+    def iter_chat_batches(self, source, chunk_size=None):
+        with open_lines(source) as lines:
+            yield from self._iter_batches(lines, chunk_size)
+
+    def _iter_batches(self, lines, chunk_size=None):
+        chunk_size = chunk_size or self.chunk_size
+        chunks = iter_message_chunks(metrics.counted(lines, "lines_read"), chunk_size)
+
+        while True:
+            # Lectura, preprocesamiento y armado se miden por separado
+            with metrics.stage("parse"):
+                records = next(chunks, None)
+            if records is None:
+                break
+            metrics.count("messages_parsed", len(records))
+            with metrics.stage("preprocess"):
+                cleaned = self.preprocess_texts([record[3] for record in records])
+            with metrics.stage("build_frame"):
+                batch = build_batch(records, cleaned)
+            # La linea tenia forma de fecha pero no es valida (p.ej. 31/02/23):
+            # queda NaT y fuera de los rangos por fecha de los reportes
+            invalid = int(batch['fecha_hora'].isna().sum())
+            if invalid:
+                metrics.count("invalid_dates", invalid)
+                logger.warning("%d mensajes con fecha inválida en el lote", invalid)
+            if len(batch):
+                yield batch
+
+    def load_chat(self, source):
+        head = []
         try:
-            messages = []
-        
-            with open(file_path, 'r', encoding='utf-8') as file:
-                for line in file:
-                    line = line.strip()
-                    if not line:
-                        continue
-                
-                    # Patrón actualizado para coincidir con el formato:
-                    # "DD/MM/YY, HH:mm - Usuario: Mensaje"
-                    pattern = r'(\d{2}/\d{2}/\d{2}),\s(\d{2}:\d{2})\s-\s(\d+):\s(.+)'
-                    match = re.match(pattern, line)
-
-                    if match:
-                        date, time, user, message = match.groups()
-                        
-                        if message:
-                            # Procesa del mensaje
-                            preprocessed_message = self.preprocess_text(message)
-                            
-                            if preprocessed_message:
-                                messages.append({
-                                    'fecha': date,
-                                    'hora': time,
-                                    'usuario': user.strip(),
-                                    'mensaje_original': message,
-                                    'mensaje_limpio': preprocessed_message
-                                })
-
-            if not messages:
-                raise ValueError("No se encontraron mensajes válidos en el archivo")
+            with open_lines(source) as lines:
+                df = concat_batches(self._iter_batches(iter_with_head(lines, head)))
 
-            return pd.DataFrame(messages)
+            if df is None:
+                raise ValueError("No se encontraron mensajes válidos en el archivo")
+            metrics.count("messages_kept", len(df))
+            return df
         
         except Exception as e:
-            print(f"Error al procesar el archivo: {str(e)}")
-            print("Primeras líneas del archivo:")
-            try:
-                with open(file_path, 'r', encoding='utf-8') as file:
-                    print(file.read()[:500])
-            except:
-                print("No se pudo leer el archivo")
+            logger.exception(
+                "Error al procesar el archivo: %s. Primeras líneas: %r",
+                e, "\n".join(head)[:500] if head else "No se pudo leer el archivo"
+            )
             raise Exception(f"Error al cargar el chat: {str(e)}")
 
-    def cluster_messages(self, df, method="lda", n_groups=5):
+    def cluster_messages(self, df, method="lda", n_groups=5, time_budget=None, save_as=None):
         try:
-            if len(df) < n_groups:
+            texts = df['mensaje_limpio']
+            weights = None
+            collapsed = None
+            if self.dedup:
+                # Se ajusta con un representante por grupo de repetidos
+                with metrics.stage("dedup"):
+                    collapsed = collapse_duplicates(texts.tolist(), self.near_duplicate_threshold)
+                texts = texts.iloc[collapsed.representatives]
+                weights = collapsed.weights
+            metrics.record("unique_messages", len(texts))
+
+            if len(texts) < n_groups:
                 # Ajustar el número de grupos si hay pocos mensajes
-                adjusted_groups = min(len(df), 3)
-                print(f"Ajustando número de grupos de {n_groups} a {adjusted_groups} debido a la cantidad de mensajes")
+                adjusted_groups = min(len(texts), 3)
+                logger.info(
+                    "Ajustando número de grupos de %d a %d debido a la cantidad de mensajes",
+                    n_groups, adjusted_groups
+                )
                 n_groups = adjusted_groups
 
-            vectorizer = TfidfVectorizer(
-                min_df=1,  # Para pocos mensajes
-                max_df=0.95,
-                ngram_range=(1, 2),
-                stop_words=self._get_stop_words()
-            )
-            
-            X = vectorizer.fit_transform(df['mensaje_limpio'])
-            
-            if method == 'kmeans':
-                if n_groups == 1:
-                    # Si solo hay un grupo, asignar todo al mismo cluster
-                    clusters = np.zeros(len(df))
-                    keywords = {0: self._get_top_keywords(vectorizer, X, n=20)}
-                else:
-                    model = KMeans(n_clusters=n_groups, random_state=42, n_init=10)
-                    clusters = model.fit_predict(X)
-                    keywords = self._get_kmeans_keywords(model, vectorizer)
-            else:  # lda
-                if n_groups == 1:
-                    # Si solo hay un grupo, asignar todo al mismo topic
-                    clusters = np.zeros(len(df))
-                    keywords = {0: self._get_top_keywords(vectorizer, X, n=20)}
-                else:
-                    model = LatentDirichletAllocation(
-                        n_components=n_groups, 
-                        random_state=42,
-                        max_iter=10  # Reducido para conjuntos pequeños
-                    )
-                    topic_distribution = model.fit_transform(X)
-                    clusters = topic_distribution.argmax(axis=1)
-                    keywords = self._get_lda_keywords(model, vectorizer)
-                
+            with metrics.stage("vectorize"):
+                vectorizer, X = self._vectorize(texts, weights)
+            metrics.record("vocabulary_size", X.shape[1])
+
+            engine = None
+            start = time.perf_counter()
+            if n_groups == 1:
+                # Si solo hay un grupo, asignar todo al mismo cluster
+                clusters = np.zeros(X.shape[0])
+                # Similitud con el centro de todos los mensajes
+                center = X.mean(axis=0) if weights is None else weights @ X / weights.sum()
+                scores = np.asarray(X @ np.asarray(center).ravel()).ravel()
+                keywords = {0: self._get_top_keywords(vectorizer, X, n=20, weights=weights)}
+            else:
+                engine = make_engine(method, X, n_groups, time_budget)
+                with metrics.stage("fit"):
+                    clusters = engine.fit_predict(X, n_groups, sample_weight=weights)
+                metrics.record("fit_iterations", int(getattr(engine.model, "n_iter_", 0)))
+                scores = engine.scores
+                with metrics.stage("keywords"):
+                    keywords = self._get_engine_keywords(engine, vectorizer)
+
+            if collapsed is not None:
+                clusters = collapsed.expand(clusters)
+                scores = collapsed.expand(scores)
             df['cluster'] = clusters
+            df['cluster_score'] = scores
+            df.attrs['clustering'] = {
+                # Con un solo grupo no se ajusta ningun motor
+                "engine": None if engine is None else engine.name,
+                "seconds": round(time.perf_counter() - start, 4),
+                "n_groups": n_groups,
+                "unique_messages": X.shape[0],
+                "vocabulary_size": X.shape[1],
+                "params": {} if engine is None else engine.params,
+            }
+            if save_as is not None:
+                # Con un solo grupo no hay modelo ajustado que guardar
+                with metrics.stage("save_artifact"):
+                    df.attrs['clustering']["artifact"] = None if engine is None else (
+                        self.save_artifact(save_as, vectorizer, engine, keywords, len(df))
+                    )
             return df, keywords
 
         except Exception as e:
-            print(f"Error en clustering: {str(e)}")
+            logger.exception("Error en clustering: %s", e)
             raise Exception(f"Error en el clustering de mensajes: {str(e)}")
-    
-    def _get_top_keywords(self, vectorizer, X, n=20):
+
+    def save_artifact(self, name, vectorizer, engine, keywords, n_messages):
+        if self.artifact_store is None:
+            raise ValueError("No hay un directorio de artefactos configurado")
+        meta = self.artifact_store.save(name, vectorizer, engine.model, {
+            "engine": engine.name,
+            "params": engine.params,
+            "n_groups": len(keywords),
+            "n_messages": n_messages,
+            "keywords": {
+                str(cluster): [str(term) for term in terms[:10]]
+                for cluster, terms in keywords.items()
+            },
+            "config_fingerprint": self.config_fingerprint,
+        })
+        return {"name": meta["name"], "version": meta["version"]}
+
+    def _vectorize(self, texts, weights=None):
+        if weights is not None:
+            # Frecuencias e idf como si cada texto estuviera repetido
+            limits = vocabulary_limits(int(weights.sum()))
+            try:
+                return self.vectorizer_config.fit_weighted(texts, weights, **limits)
+            except ValueError:
+                return self.vectorizer_config.fit_weighted(texts, weights)
+
+        limits = vocabulary_limits(len(texts))
+        try:
+            vectorizer = self.vectorizer_config.make_vectorizer(**limits)
+            return vectorizer, vectorizer.fit_transform(texts)
+        except ValueError:
+            # La poda dejo el vocabulario vacio: se usa sin limites
+            vectorizer = self.vectorizer_config.make_vectorizer()
+            return vectorizer, vectorizer.fit_transform(texts)
+
+    def update_topic_model(self, df, model):
+        try:
+            with metrics.stage("incremental_update"):
+                clusters, scores, keywords, info = model.update(df)
+            df['cluster'] = clusters
+            df['cluster_score'] = scores
+            return df, keywords, info
+
+        except Exception as e:
+            logger.exception("Error en la actualización del modelo: %s", e)
+            raise Exception(f"Error en la actualización del modelo del chat: {str(e)}")
+
+    def _get_top_keywords(self, vectorizer, X, n=20, weights=None):
         feature_names = vectorizer.get_feature_names_out()
-        sums = X.sum(axis=0).A1
+        sums = X.sum(axis=0).A1 if weights is None else np.asarray(weights @ X).ravel()
         return [feature_names[i] for i in sums.argsort()[-n:][::-1]]
 
     def save_results(self, df, keywords, temp_dir):
         try:
             os.makedirs(temp_dir, exist_ok=True)
 
+            # Una sola pasada arma los datos de todos los temas
+            reports = build_cluster_reports(df, keywords)
+
             # Los archivos cluster de los mensajes
-            for cluster in df["cluster"].unique():
-                df_cluster = df[df["cluster"] == cluster]
-                self._save_cluster_file(
-                    df_cluster, cluster, keywords[cluster], temp_dir
-                )
+            for report in reports:
+                self._save_cluster_file(report, temp_dir)
 
             # Se guardara el archivo resumen
-            self._save_summary_file(df, keywords, temp_dir)
+            self._save_summary_file(reports, temp_dir)
 
         except Exception as e:
             raise Exception(f"Error al guardar resultados: {str(e)}")
@@ -199,33 +387,29 @@ class ChatAnalyzer:
             if len(df) == 0:
                 raise ValueError("No se encontraron mensajes válidos en el chat")
 
-            # Crear un directorio temporal para los archivos
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            temp_dir = tempfile.mkdtemp()
 
             try:
-                # Procesar y guardar los resultados en el directorio temporal
                 df_processed, keywords = self.cluster_messages(df, method)
-                self.save_results(df_processed, keywords, temp_dir)
+                reports = build_cluster_reports(df_processed, keywords)
 
-                # Crear el archivo ZIP
+                # El ZIP se arma directo desde memoria, sin directorio temporal
                 zip_filename = f"resultados_chat_{timestamp}.zip"
                 zip_path = os.path.join(os.getcwd(), zip_filename)
 
-                with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zipf:
-                    # Agregar todos los archivos del directorio temporal al ZIP
-                    for root, _, files in os.walk(temp_dir):
-                        for file in files:
-                            file_path = os.path.join(root, file)
-                            arcname = os.path.relpath(file_path, temp_dir)
-                            zipf.write(file_path, arcname)
+                try:
+                    with open(zip_path, "wb") as f:
+                        for chunk in iter_zip(iter_report_files(reports)):
+                            f.write(chunk)
+                except Exception:
+                    # No dejar un ZIP a medio escribir
+                    if os.path.exists(zip_path):
+                        os.remove(zip_path)
+                    raise
 
                 return zip_path
 
             finally:
-                # Limpiar el directorio temporal
-                shutil.rmtree(temp_dir, ignore_errors=True)
-
                 # Limpiar el archivo temporal de entrada
                 if file_path.startswith("temp_"):
                     try:
@@ -236,101 +420,31 @@ class ChatAnalyzer:
         except Exception as e:
             raise Exception(f"Error en el análisis: {str(e)}")
 
-    def _get_stop_words(self):
-        
-        stop_words_base = set(stopwords.words('spanish'))
-        
-        basic_stop_words = [
-            "de", "la", "que", "el", "en", "y", "a", "los", "se", "del", "las",
-            "un", "por", "con", "una", "su", "para", "es", "al", "lo", "como",
-            "mas", "pero", "sus", "le", "ya", "o", "este", "si", "porque", "muy",
-            "sin", "sobre", "mi", "hay", "bien", "cuando", "ahora", "esta", "asi",
-            "nos", "ni", "ese", "eso", "esto", "etc", "otro", "tras"
-        ]
-        
-        chat_stop_words  = [
-            "aea", "ya", "asi", "osea", "sea", "pues", "bueno", "igual", "tipo",
-            "nomas", "nomás", "asu", "asuu", "ah", "eh", "oh", "mmm", "umm",
-            "este", "esta", "esto", "ps", "pe", "nel", "simon", "simón", "ora",
-            "tons", "entonces", "aja", "ajá", "dale", "va", "nel", "pos", "pss"
-        ]
-        
-        return list(stop_words_base.union(basic_stop_words, chat_stop_words))
-
-    def _get_kmeans_keywords(self, model, vectorizer):
+    def _get_engine_keywords(self, engine, vectorizer):
         try:
             keywords = {}
             feature_names = vectorizer.get_feature_names_out()
-            for i, center in enumerate(model.cluster_centers_):
-                top_indices = center.argsort()[-20:][::-1]
+            for i, weights in enumerate(engine.keyword_weights):
+                top_indices = weights.argsort()[-20:][::-1]
                 keywords[i] = [feature_names[idx] for idx in top_indices]
             return keywords
         except Exception as e:
-            raise Exception(f"Error al obtener keywords de KMeans: {str(e)}")
+            raise Exception(f"Error al obtener keywords de {engine.name}: {str(e)}")
 
-    def _get_lda_keywords(self, model, vectorizer):
+    def _save_cluster_file(self, report, directory):
         try:
-            keywords = {}
-            feature_names = vectorizer.get_feature_names_out()
-            for i, topic in enumerate(model.components_):
-                top_indices = topic.argsort()[-20:][::-1]
-                keywords[i] = [feature_names[idx] for idx in top_indices]
-            return keywords
-        except Exception as e:
-            raise Exception(f"Error al obtener keywords de LDA: {str(e)}")
-
-    def _save_cluster_file(self, df_cluster, cluster_num, keywords, directory):
-        try:
-            file_path = os.path.join(directory, f"tema_{cluster_num+1}.txt")
+            file_path = os.path.join(directory, f"tema_{report.cluster+1}.txt")
 
             with open(file_path, "w", encoding="utf-8") as f:
-                f.write(f"TEMA {cluster_num+1}\n")
-                f.write("=" * 50 + "\n\n")
-
-                # Escribir las palabras claves
-                f.write("PALABRAS CLAVE DEL TEMA:\n")
-                f.write(", ".join(keywords) + "\n\n")
-
-                # Escribir estadisticas
-                f.write(f"Total mensajes: {len(df_cluster)}\n")
-                f.write(f"Participantes: {df_cluster['usuario'].nunique()}\n")
-                f.write(
-                    f"Período: {df_cluster['fecha'].min()} a {df_cluster['fecha'].max()}\n\n"
-                )
-
-                # Escribir mensajes
-                f.write("MENSAJES DEL TEMA:\n")
-                f.write("-" * 50 + "\n\n")
-
-                for fecha in sorted(df_cluster["fecha"].unique()):
-                    mensajes_fecha = df_cluster[df_cluster["fecha"] == fecha]
-                    f.write(f"\n[{fecha}]\n")
-                    for _, row in mensajes_fecha.iterrows():
-                        f.write(
-                            f"{row['hora']} - {row['usuario']}: {row['mensaje_original']}\n"
-                        )
+                f.write(render_topic_file(report))
         except Exception as e:
             raise Exception(f"Error al guardar archivo del cluster: {str(e)}")
 
-    def _save_summary_file(self, df, keywords, directory):
+    def _save_summary_file(self, reports, directory):
         try:
             file_path = os.path.join(directory, "resumen_temas.txt")
 
             with open(file_path, "w", encoding="utf-8") as f:
-                f.write("RESUMEN DE TEMAS\n")
-                f.write("=" * 50 + "\n\n")
-
-                for cluster in sorted(df["cluster"].unique()):
-                    df_cluster = df[df["cluster"] == cluster]
-                    f.write(f"\nTEMA {cluster+1}:\n")
-                    f.write(f"- Mensajes: {len(df_cluster)}\n")
-                    f.write(f"- Usuarios: {df_cluster['usuario'].nunique()}\n")
-                    f.write(f"- Palabras clave: {', '.join(keywords[cluster][:10])}\n")
-                    f.write("- Ejemplo mensaje:\n")
-                    if not df_cluster.empty:
-                        ejemplo = df_cluster.iloc[0]
-                        f.write(
-                            f"  {ejemplo['usuario']}: {ejemplo['mensaje_original'][:100]}...\n"
-                        )
+                f.write(render_summary(reports))
         except Exception as e:
             raise Exception(f"Error al guardar archivo de resumen: {str(e)}")
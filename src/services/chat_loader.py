@@ -0,0 +1,185 @@
+import codecs
+import os
+import re
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+
+# "DD/MM/YY, HH:mm - Usuario: Mensaje"
+MESSAGE_PATTERN = re.compile(r'(\d{2}/\d{2}/\d{2}),\s(\d{2}:\d{2})\s-\s(\d+):\s(.+)')
+# Cualquier linea con fecha (incluye avisos del sistema sin usuario)
+HEADER_PATTERN = re.compile(r'\d{2}/\d{2}/\d{2},\s\d{2}:\d{2}\s-\s')
+
+DATETIME_FORMAT = "%d/%m/%y %H:%M"
+DATE_FORMAT = "%d/%m/%y"
+TIME_LABELS = np.array(
+    [f"{minute // 60:02d}:{minute % 60:02d}" for minute in range(24 * 60)] + [""],
+    dtype=object
+)
+DEFAULT_CHUNK_SIZE = 10000
+READ_BLOCK_SIZE = 1 << 16
+
+
+def iter_text_lines(stream, encoding='utf-8', block_size=READ_BLOCK_SIZE):
+    # Decodifica un flujo binario por bloques sin cargarlo entero en memoria
+    decoder = codecs.getincrementaldecoder(encoding)()
+    pending = ""
+
+    while True:
+        block = stream.read(block_size)
+        if not block:
+            break
+        text = block if isinstance(block, str) else decoder.decode(block)
+        # "\r\n" deja una linea vacia extra que el parser ya ignora
+        lines = (pending + text).replace("\r", "\n").split("\n")
+        pending = lines.pop()
+        yield from lines
+
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+@contextmanager
+def open_lines(source):
+    # Acepta una ruta o cualquier objeto con read() (p. ej. UploadFile.file)
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'r', encoding='utf-8') as file:
+            yield file
+    else:
+        yield iter_text_lines(source)
+
+
+def iter_with_head(lines, head, limit=500):
+    # Guarda el inicio del archivo para los mensajes de error
+    size = 0
+    for line in lines:
+        if size < limit:
+            head.append(line)
+            size += len(line)
+        yield line
+
+
+def iter_raw_messages(lines):
+    current = None
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+
+        match = MESSAGE_PATTERN.match(line)
+        if match:
+            if current is not None:
+                yield tuple(current)
+            date, time, user, message = match.groups()
+            current = [date, time, user.strip(), message]
+        elif HEADER_PATTERN.match(line):
+            # Aviso del sistema: cierra el mensaje anterior y se descarta
+            if current is not None:
+                yield tuple(current)
+            current = None
+        elif current is not None:
+            # Continuacion de un mensaje de varias lineas
+            current[3] += "\n" + line
+
+    if current is not None:
+        yield tuple(current)
+
+
+def iter_message_chunks(lines, chunk_size=DEFAULT_CHUNK_SIZE):
+    chunk = []
+    for record in iter_raw_messages(lines):
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def build_batch(records, cleaned):
+    dates, times, users, messages = zip(*records)
+
+    df = pd.DataFrame({
+        'fecha_hora': pd.to_datetime(
+            [f"{date} {time}" for date, time in zip(dates, times)],
+            format=DATETIME_FORMAT,
+            errors="coerce"
+        ),
+        'usuario': pd.Categorical(users),
+        'mensaje_original': pd.Series(messages, dtype=object),
+        'mensaje_limpio': pd.Series(cleaned, dtype=object),
+    })
+
+    return df[df['mensaje_limpio'] != ""].reset_index(drop=True)
+
+
+def _join(parts):
+    # Une una columna y suelta sus lotes antes de pasar a la siguiente
+    joined = np.concatenate(parts)
+    parts.clear()
+    return joined
+
+
+def concat_batches(batches):
+    # Mismo resultado que pd.concat(list(batches)) con usuario categorico, pero
+    # de cada lote solo se guardan sus arreglos (el DataFrame se libera al
+    # leer el siguiente) y el pico queda en el marco final mas una columna
+    dates, users, originals, cleaned = [], [], [], []
+    user_ids = {}
+    for batch in batches:
+        dates.append(batch['fecha_hora'].to_numpy())
+        column = batch['usuario'].array
+        lookup = np.array(
+            [user_ids.setdefault(user, len(user_ids)) for user in column.categories],
+            dtype=np.int32
+        )
+        users.append(lookup[column.codes])
+        originals.append(batch['mensaje_original'].to_numpy(dtype=object))
+        cleaned.append(batch['mensaje_limpio'].to_numpy(dtype=object))
+    if not dates:
+        return None
+
+    # Categorias en orden, como las deja astype('category')
+    names = sorted(user_ids)
+    remap = np.empty(len(names), dtype=np.int32)
+    remap[[user_ids[name] for name in names]] = np.arange(len(names), dtype=np.int32)
+
+    return pd.DataFrame({
+        'fecha_hora': _join(dates),
+        'usuario': pd.Categorical.from_codes(remap[_join(users)], categories=names),
+        'mensaje_original': pd.Series(_join(originals), dtype=object),
+        'mensaje_limpio': pd.Series(_join(cleaned), dtype=object),
+    })
+
+
+def format_date(value):
+    return "" if pd.isna(value) else value.strftime(DATE_FORMAT)
+
+
+def _format_days(values):
+    # strftime es lento: se formatea una vez cada dia distinto
+    codes, days = pd.factorize(values.dt.normalize())
+    labels = np.append(days.strftime(DATE_FORMAT).to_numpy(dtype=object), "")
+    return pd.Series(labels[codes], index=values.index, dtype=object)
+
+
+def _format_times(values):
+    # Tabla con los 1440 minutos del dia; -1 (fecha invalida) queda vacio
+    minutes = (values.dt.hour * 60 + values.dt.minute).fillna(-1).astype(int)
+    return pd.Series(
+        TIME_LABELS[minutes.to_numpy()], index=values.index, dtype=object
+    )
+
+
+def format_messages(df):
+    # Vuelve a las columnas de texto que ven los clientes y los reportes
+    return pd.DataFrame({
+        'fecha': _format_days(df['fecha_hora']),
+        'hora': _format_times(df['fecha_hora']),
+        'usuario': df['usuario'].astype(str),
+        'mensaje_original': df['mensaje_original'],
+    }, index=df.index)
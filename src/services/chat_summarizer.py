@@ -1,77 +1,293 @@
-from openai import OpenAI
-import time
+import asyncio
+import hashlib
+import json
 import os
+import random
+import weakref
+from functools import cached_property
 from typing import Dict, List
 
+from services.json_stream import read_messages
+from services.prompt_builder import (
+    DEFAULT_TOKEN_BUDGET,
+    estimate_tokens,
+    even_ranking,
+    select_messages,
+)
+from services import metrics
+from services.rate_limiter import TokenBucket
+
+
+SYSTEM_PROMPT = "Eres un experto en análisis y resumen de conversaciones."
+TEMPERATURE = 0.7
+MAX_TOKENS = 1000
+# Errores temporales que vale la pena reintentar
+RETRY_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+def _openai():
+    # openai (con httpx y pydantic) se importa con el primer resumen, no al
+    # levantar el servidor
+    import openai
+    return openai
+
+
+def _message_line(record):
+    return f"{record['hora']} - {record['usuario']}: {record['mensaje_original']}"
+
+
+def report_inputs(reports):
+    # Por tema: solo los mensajes candidatos (posicion -> linea), las
+    # palabras clave y el orden de representatividad
+    inputs = {}
+    for report in reports:
+        ranking = report.ranking or even_ranking(report.message_count)
+        records = report.messages.iloc[ranking].to_dict("records")
+        messages = {
+            position: _message_line(record)
+            for position, record in zip(ranking, records)
+        }
+        inputs[report.cluster] = (messages, report.keywords[:10], ranking)
+    return inputs
+
+
+def result_inputs(index, file):
+    # Lo mismo desde un resultado en cache: solo se leen los bloques de
+    # mensajes que contienen a los candidatos
+    inputs = {}
+    for data in index["topics"]:
+        ranking = data["representative_messages"] or even_ranking(data["message_count"])
+        records = read_messages(file, data, ranking)
+        messages = {position: _message_line(records[position]) for position in ranking}
+        inputs[data["topic"]] = (messages, data["keywords"][:10], ranking)
+    return inputs
+
+
 class ChatSummarizer:
-    def __init__(self, api_key: str):
-        self.client = OpenAI(api_key=api_key)
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = None,
+        model: str = "gpt-3.5-turbo-16k",
+        max_concurrency: int = 4,
+        requests_per_minute: int = 60,
+        tokens_per_minute: int = None,
+        max_retries: int = 5,
+        timeout: float = 60.0,
+        prompt_token_budget: int = DEFAULT_TOKEN_BUDGET,
+        cache=None
+    ):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.prompt_token_budget = prompt_token_budget
+        self.cache = cache
 
-    def generate_summary(self, messages: List[str], keywords: List[str]) -> str:
-        prompt = (
+        # Pedidos por minuto y, si se configura, tokens estimados por minuto;
+        # 0 o None es sin limite
+        self.request_limiter = None
+        if requests_per_minute:
+            self.request_limiter = TokenBucket(requests_per_minute / 60, capacity=max_concurrency)
+        self.token_limiter = None
+        if tokens_per_minute:
+            self.token_limiter = TokenBucket(tokens_per_minute / 60, capacity=tokens_per_minute)
+
+        # Cliente async y semaforo por event loop
+        self._loops = weakref.WeakKeyDictionary()
+
+    @cached_property
+    def client(self):
+        return _openai().OpenAI(
+            api_key=self.api_key, base_url=self.base_url, timeout=self.timeout
+        )
+
+    def build_prompt(self, messages, keywords: List[str], ranking=None) -> str:
+        # Los mas representativos sin casi-duplicados, dentro del presupuesto
+        selected = select_messages(messages, ranking, self.prompt_token_budget)
+        return (
             "Analiza y resume la siguiente conversación de WhatsApp.\n\n"
             f"Palabras clave identificadas: {', '.join(keywords)}\n\n"
             "Mensajes principales:\n"
-            + '\n'.join(messages[:50]) +
+            + '\n'.join(selected) +
             "\n\nPor favor, proporciona:\n"
             "1. Un resumen conciso de los temas principales\n"
             "2. Puntos clave de la discusión\n"
             "3. Conclusiones o decisiones importantes"
         )
 
-        try:
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo-16k",
-                messages=[
-                    {"role": "system", "content": "Eres un experto en análisis y resumen de conversaciones."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=1000
+    def _request_kwargs(self, prompt):
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": TEMPERATURE,
+            "max_tokens": MAX_TOKENS,
+        }
+
+    def _cache_key(self, prompt):
+        # Todo lo que cambia la respuesta: modelo, prompts y parametros
+        data = json.dumps(self._request_kwargs(prompt), ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def _cached(self, key):
+        if self.cache is None:
+            return None
+        content = self.cache.get(key)
+        if content is None:
+            metrics.count("summary_cache_misses")
+            return None
+        metrics.count("summary_cache_hits")
+        return json.loads(content)["summary"]
+
+    def _store(self, key, summary):
+        if self.cache is not None:
+            self.cache.put(
+                key, json.dumps({"summary": summary}, ensure_ascii=False).encode("utf-8")
             )
-            return response.choices[0].message.content
+
+    def generate_summary(self, messages: List[str], keywords: List[str], ranking=None) -> str:
+        prompt = self.build_prompt(messages, keywords, ranking)
+        key = self._cache_key(prompt)
+        summary = self._cached(key)
+        if summary is not None:
+            return summary
+
+        try:
+            response = self.client.chat.completions.create(**self._request_kwargs(prompt))
+            summary = response.choices[0].message.content
         except Exception as e:
             return f"Error generating summary: {str(e)}"
+        self._store(key, summary)
+        return summary
+
+    async def summarize(self, messages, keywords: List[str], ranking=None) -> str:
+        prompt = self.build_prompt(messages, keywords, ranking)
+        key = self._cache_key(prompt)
+        # La cache esta en disco: se lee y escribe fuera del event loop
+        summary = await asyncio.to_thread(self._cached, key)
+        if summary is not None:
+            return summary
+
+        try:
+            summary = await self._request(prompt)
+        except Exception as e:
+            return f"Error generating summary: {str(e)}"
+        await asyncio.to_thread(self._store, key, summary)
+        return summary
+
+    async def summarize_topics(self, inputs) -> Dict[int, str]:
+        # inputs: tema -> (mensajes, palabras clave[, ranking]); todos a la vez
+        topics = sorted(inputs)
+        summaries = await asyncio.gather(
+            *(self.summarize(*inputs[topic]) for topic in topics)
+        )
+        return dict(zip(topics, summaries))
+
+    def _async_state(self):
+        loop = asyncio.get_running_loop()
+        state = self._loops.get(loop)
+        if state is None:
+            client = _openai().AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                timeout=self.timeout,
+                max_retries=0  # Los reintentos se manejan aqui, con el limitador
+            )
+            state = (client, asyncio.Semaphore(self.max_concurrency))
+            self._loops[loop] = state
+        return state
+
+    async def _request(self, prompt):
+        openai = _openai()
+        client, semaphore = self._async_state()
+        for attempt in range(self.max_retries + 1):
+            if self.request_limiter is not None:
+                await self.request_limiter.acquire()
+            if self.token_limiter is not None:
+                # Prompt estimado mas la respuesta maxima
+                await self.token_limiter.acquire(estimate_tokens(prompt) + MAX_TOKENS)
+            try:
+                async with semaphore:
+                    response = await client.chat.completions.create(
+                        **self._request_kwargs(prompt)
+                    )
+                return response.choices[0].message.content
+            except (openai.APIConnectionError, openai.APIStatusError) as e:
+                if attempt == self.max_retries or not self._retryable(e):
+                    raise
+                await asyncio.sleep(self._backoff(attempt, e))
+
+    @staticmethod
+    def _retryable(error):
+        if isinstance(error, _openai().APIStatusError):
+            return error.status_code in RETRY_STATUS
+        return True
+
+    @staticmethod
+    def _backoff(attempt, error):
+        # Se respeta Retry-After; si no viene, exponencial con jitter
+        if isinstance(error, _openai().APIStatusError):
+            retry_after = error.response.headers.get("retry-after")
+            try:
+                return max(0.0, float(retry_after))
+            except (TypeError, ValueError):
+                pass
+        return random.uniform(0, min(30.0, 2 ** attempt))
+
+    async def aclose(self):
+        state = self._loops.pop(asyncio.get_running_loop(), None)
+        if state is not None:
+            await state[0].close()
 
     def generate_summaries(self, results_dir: str) -> Dict[int, str]:
-        summaries = {}
-        
+        inputs = {}
+
         for file in os.listdir(results_dir):
             if file.startswith("tema_") and file.endswith(".txt"):
                 topic_num = int(file.split("_")[1].split(".")[0])
                 file_path = os.path.join(results_dir, file)
-                
-                messages, keywords = self._extract_content(file_path)
-                summary = self.generate_summary(messages, keywords)
-                summaries[topic_num] = summary
-                
-                time.sleep(1)  # Poner tiempo para leer
-                
+                inputs[topic_num] = self._extract_content(file_path)
+
+        # Los temas se resumen en paralelo; el limitador reemplaza la pausa fija
+        summaries = asyncio.run(self._summarize_and_close(inputs))
         self._save_summaries(results_dir, summaries)
         return summaries
 
+    async def _summarize_and_close(self, inputs):
+        try:
+            return await self.summarize_topics(inputs)
+        finally:
+            await self.aclose()
+
     def _extract_content(self, file_path: str) -> tuple:
         messages = []
         keywords = []
-        
+
         with open(file_path, 'r', encoding='utf-8') as f:
             content = f.read()
             if "PALABRAS CLAVE DEL TEMA:" in content:
                 keywords_section = content.split("PALABRAS CLAVE DEL TEMA:")[1].split("\n")[1]
                 keywords = [k.strip() for k in keywords_section.split(",")]
-            
+
             if "MENSAJES DEL TEMA:" in content:
                 messages_section = content.split("MENSAJES DEL TEMA:")[1]
-                messages = [m.strip() for m in messages_section.split("\n") 
-                          if m.strip() and not m.strip().startswith("=") 
-                          and not m.strip().startswith("-")]
-                
+                # Sin las cabeceras [fecha]
+                messages = [m.strip() for m in messages_section.split("\n")
+                          if m.strip() and not m.strip().startswith("=")
+                          and not m.strip().startswith("-")
+                          and not m.strip().startswith("[")]
+
         return messages, keywords
 
     def _save_summaries(self, results_dir: str, summaries: Dict[int, str]):
         summaries_dir = os.path.join(results_dir, "resumenes_gpt")
         os.makedirs(summaries_dir, exist_ok=True)
-        
+
         # Guardar el resumen individual
         for topic_num, summary in summaries.items():
             file_path = os.path.join(summaries_dir, f"resumen_gpt_tema_{topic_num}.txt")
@@ -79,7 +295,7 @@ class ChatSummarizer:
                 f.write(f"RESUMEN - TEMA {topic_num}\n")
                 f.write("="*50 + "\n\n")
                 f.write(summary)
-        
+
         # Guardar el general resumen
         general_summary_path = os.path.join(summaries_dir, "resumen_general_gpt.txt")
         with open(general_summary_path, 'w', encoding='utf-8') as f:
@@ -88,4 +304,4 @@ class ChatSummarizer:
             for topic_num, summary in sorted(summaries.items()):
                 f.write(f"\nTEMA {topic_num}\n")
                 f.write("-"*20 + "\n")
-                f.write(summary + "\n")
\ No newline at end of file
+                f.write(summary + "\n")
@@ -0,0 +1,234 @@
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+# scipy y sklearn se importan al ajustar: al inicio toman mas de un segundo
+
+
+class ClusteringEngine(ABC):
+    name = None
+    # Segundos aproximados por millon de valores no nulos de la matriz
+    # (medidos con 5 grupos), usados por el modo auto para estimar la latencia
+    seconds_per_mnnz = 1.0
+
+    def __init__(self, **params):
+        self.params = params
+        self.model = None
+        # Que tan representativo es cada mensaje de su grupo (mayor = mas)
+        self.scores = None
+
+    @classmethod
+    def for_corpus(cls, X):
+        return cls(**cls.corpus_params(X.shape[0]))
+
+    @staticmethod
+    def corpus_params(n_messages):
+        return {}
+
+    @abstractmethod
+    def fit_predict(self, X, n_groups, sample_weight=None):
+        # sample_weight: cuantos mensajes representa cada fila (None = 1)
+        pass
+
+    def predict(self, X):
+        # Grupo y puntaje de mensajes nuevos con el modelo ya ajustado
+        doc_topic = self.model.transform(X)
+        return doc_topic.argmax(axis=1), topic_scores(doc_topic)
+
+    @property
+    @abstractmethod
+    def keyword_weights(self):
+        pass
+
+    def _fit_topics(self, X, sample_weight=None):
+        # Motores de temas (LDA, NMF): grupo = tema de mayor peso
+        if sample_weight is None:
+            doc_topic = self.model.fit_transform(X)
+        else:
+            doc_topic = self._fit_weighted(X, sample_weight)
+        self.scores = topic_scores(doc_topic)
+        return doc_topic.argmax(axis=1)
+
+    def estimate_seconds(self, X, n_groups):
+        # Crece con los mensajes (nnz), el vocabulario y los grupos
+        work = (X.nnz + X.shape[1]) / 1e6
+        return work * self.seconds_per_mnnz * n_groups / 5
+
+
+class KMeansEngine(ClusteringEngine):
+    name = "kmeans"
+    seconds_per_mnnz = 6.0
+
+    def fit_predict(self, X, n_groups, sample_weight=None):
+        from sklearn.cluster import KMeans
+        self.model = KMeans(n_clusters=n_groups, random_state=42, n_init=10)
+        return self._fit_scores(X, sample_weight)
+
+    def _fit_scores(self, X, sample_weight=None):
+        labels = self.model.fit_predict(X, sample_weight=sample_weight)
+        self.scores = centroid_scores(self.model.transform(X), labels)
+        return labels
+
+    def predict(self, X):
+        distances = self.model.transform(X)
+        labels = distances.argmin(axis=1)
+        return labels, centroid_scores(distances, labels)
+
+    @property
+    def keyword_weights(self):
+        return self.model.cluster_centers_
+
+
+class MiniBatchKMeansEngine(KMeansEngine):
+    name = "minibatch_kmeans"
+    seconds_per_mnnz = 1.5
+
+    @staticmethod
+    def corpus_params(n_messages):
+        return {"batch_size": batch_size_for(n_messages)}
+
+    def fit_predict(self, X, n_groups, sample_weight=None):
+        from sklearn.cluster import MiniBatchKMeans
+        self.model = MiniBatchKMeans(
+            n_clusters=n_groups,
+            random_state=42,
+            n_init=3,
+            batch_size=self.params.get("batch_size", 2048)
+        )
+        return self._fit_scores(X, sample_weight)
+
+
+class LDAEngine(ClusteringEngine):
+    name = "lda"
+    seconds_per_mnnz = 170.0
+
+    def fit_predict(self, X, n_groups, sample_weight=None):
+        from sklearn.decomposition import LatentDirichletAllocation
+        self.model = LatentDirichletAllocation(
+            n_components=n_groups,
+            random_state=42,
+            max_iter=10  # Reducido para conjuntos pequeños
+        )
+        return self._fit_topics(X, sample_weight)
+
+    def _fit_weighted(self, X, sample_weight):
+        # Una fila con peso w aporta como w copias a las cuentas de los temas;
+        # la distribucion de cada mensaje se infiere con su fila original
+        self.model.fit(scale_rows(X, sample_weight))
+        return self.model.transform(X)
+
+    @property
+    def keyword_weights(self):
+        return self.model.components_
+
+
+class OnlineLDAEngine(LDAEngine):
+    name = "online_lda"
+    seconds_per_mnnz = 35.0
+
+    @staticmethod
+    def corpus_params(n_messages):
+        return {"batch_size": batch_size_for(n_messages)}
+
+    def fit_predict(self, X, n_groups, sample_weight=None):
+        from sklearn.decomposition import LatentDirichletAllocation
+        self.model = LatentDirichletAllocation(
+            n_components=n_groups,
+            random_state=42,
+            learning_method="online",
+            batch_size=self.params.get("batch_size", 2048),
+            max_iter=self.params.get("max_iter", 2),
+            total_samples=X.shape[0]
+        )
+        return self._fit_topics(X, sample_weight)
+
+
+class NMFEngine(ClusteringEngine):
+    name = "nmf"
+    seconds_per_mnnz = 2.0
+
+    def fit_predict(self, X, n_groups, sample_weight=None):
+        from sklearn.decomposition import NMF
+        self.model = NMF(
+            n_components=n_groups,
+            init="nndsvda",
+            random_state=42,
+            max_iter=self.params.get("max_iter", 200)
+        )
+        return self._fit_topics(X, sample_weight)
+
+    def _fit_weighted(self, X, sample_weight):
+        # El error cuadratico de una fila escalada por sqrt(w) pesa w veces;
+        # sin regularizacion, su fila de W es sqrt(w) veces la de la original
+        root = np.sqrt(sample_weight)
+        doc_topic = self.model.fit_transform(scale_rows(X, root))
+        return doc_topic / root[:, None]
+
+    @property
+    def keyword_weights(self):
+        return self.model.components_
+
+
+def scale_rows(X, factors):
+    import scipy.sparse as sp
+    return sp.diags(np.asarray(factors, dtype=X.dtype)) @ X
+
+
+def centroid_scores(distances, labels):
+    # Distancia al centroide propio, negativa: el mas cercano puntua mas alto
+    return -distances[np.arange(len(labels)), labels]
+
+
+def topic_scores(doc_topic):
+    # Peso del tema asignado sobre el total de la fila (probabilidad en LDA)
+    best = doc_topic.max(axis=1)
+    totals = doc_topic.sum(axis=1)
+    return np.divide(best, totals, out=np.zeros_like(best), where=totals > 0)
+
+
+ENGINES = {
+    engine.name: engine
+    for engine in (
+        KMeansEngine,
+        MiniBatchKMeansEngine,
+        LDAEngine,
+        OnlineLDAEngine,
+        NMFEngine,
+    )
+}
+
+# Orden de preferencia del modo auto; el ultimo es siempre el mas rapido
+AUTO_PREFERENCE = ["lda", "online_lda", "kmeans", "nmf", "minibatch_kmeans"]
+DEFAULT_TIME_BUDGET = 30.0
+
+
+def vocabulary_limits(n_messages):
+    # Con mas mensajes se exige mas frecuencia minima y se acota el vocabulario
+    if n_messages < 1000:
+        return {"min_df": 1, "max_features": None}
+    if n_messages < 20000:
+        return {"min_df": 2, "max_features": 20000}
+    if n_messages < 200000:
+        return {"min_df": 3, "max_features": 50000}
+    return {"min_df": 5, "max_features": 100000}
+
+
+def batch_size_for(n_messages):
+    return min(8192, max(1024, n_messages // 100))
+
+
+def choose_engine(X, n_groups, time_budget=None):
+    time_budget = DEFAULT_TIME_BUDGET if time_budget is None else time_budget
+    for name in AUTO_PREFERENCE:
+        engine = ENGINES[name].for_corpus(X)
+        if engine.estimate_seconds(X, n_groups) <= time_budget:
+            return engine
+    # Nada entra en el presupuesto: el mas rapido
+    return ENGINES[AUTO_PREFERENCE[-1]].for_corpus(X)
+
+
+def make_engine(method, X, n_groups, time_budget=None):
+    if method == "auto":
+        return choose_engine(X, n_groups, time_budget)
+    # Cualquier otro valor se trata como lda, igual que antes
+    return ENGINES.get(method, LDAEngine).for_corpus(X)
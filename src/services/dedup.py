@@ -0,0 +1,146 @@
+from dataclasses import dataclass
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+
+# MinHash: 64 permutaciones en 8 bandas de 8 filas. Un par con similitud
+# (Jaccard) s coincide en alguna banda con prob. 1 - (1 - s^8)^8:
+# ~0.97 con s=0.9, ~0.75 con s=0.8 y ~0.13 con s=0.6
+NUM_PERM = 64
+BANDS = 8
+NEAR_DUPLICATE_THRESHOLD = 0.8
+# Shingles por bloque al calcular las firmas (acota la memoria temporal)
+SHINGLES_PER_BLOCK = 8192
+
+_rng = np.random.default_rng(42)
+# Hash multiply-add mod 2^64 con a impar: se comparan los minimos, que
+# dependen sobre todo de los bits altos
+_HASH_A = _rng.integers(1, 2 ** 63, NUM_PERM, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+_HASH_B = _rng.integers(0, 2 ** 63, NUM_PERM, dtype=np.uint64)
+_BAND_MIX = _rng.integers(1, 2 ** 63, NUM_PERM // BANDS, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+
+
+@dataclass
+class CollapsedMessages:
+    # Indice (en el original) del mensaje que representa a cada grupo
+    representatives: np.ndarray
+    # Grupo de cada mensaje original
+    inverse: np.ndarray
+    # Mensajes por grupo
+    weights: np.ndarray
+
+    @property
+    def n_unique(self):
+        return len(self.representatives)
+
+    def expand(self, values):
+        # Valores por grupo -> valores por mensaje original
+        return np.asarray(values)[self.inverse]
+
+
+def collapse_duplicates(texts, threshold=NEAR_DUPLICATE_THRESHOLD):
+    # texts: mensajes ya limpios. Primero iguales exactos; luego, entre los
+    # distintos, casi-duplicados (threshold None = solo exactos)
+    codes, uniques = pd.factorize(pd.Series(texts, dtype=object), use_na_sentinel=False)
+    # factorize numera en orden de aparicion: el primero de cada codigo
+    first = np.unique(codes, return_index=True)[1]
+
+    roots = np.arange(len(uniques))
+    if threshold is not None and len(uniques) > 1:
+        roots = near_duplicate_roots(minhash_signatures(list(uniques)), threshold)
+
+    groups, group_of_unique = np.unique(roots, return_inverse=True)
+    inverse = group_of_unique[codes]
+    return CollapsedMessages(
+        representatives=first[groups],
+        inverse=inverse,
+        weights=np.bincount(inverse, minlength=len(groups)),
+    )
+
+
+def _shingles(texts):
+    # Shingles = palabras y pares de palabras seguidas del mensaje limpio (los
+    # mismos n-gramas que ve el vectorizador); un mensaje vacio tiene uno vacio
+    words = [text.split() or [""] for text in texts]
+    counts = np.fromiter(map(len, words), dtype=np.int64, count=len(words))
+    codes, vocabulary = pd.factorize(pd.Series(list(chain.from_iterable(words)), dtype=object))
+    codes = codes.astype(np.uint64)
+
+    # Bigrama (a, b) -> (a + 1) * V + b, fuera del rango de las palabras
+    ends = np.cumsum(counts)
+    follows = np.ones(len(codes), dtype=bool)
+    follows[ends - 1] = False
+    first = np.flatnonzero(follows)
+    bigrams = (codes[first] + np.uint64(1)) * np.uint64(len(vocabulary)) + codes[first + 1]
+
+    # Cada mensaje: sus palabras y luego sus bigramas, contiguos
+    owner = np.repeat(np.arange(len(texts)), counts)
+    order = np.argsort(np.concatenate((owner, owner[first])), kind="stable")
+    values = np.concatenate((codes, bigrams))[order]
+    return values, counts + np.bincount(owner[first], minlength=len(texts))
+
+
+def minhash_signatures(texts):
+    values, counts = _shingles(texts)
+    signatures = np.empty((len(texts), NUM_PERM), dtype=np.uint64)
+    hashed = np.empty((NUM_PERM, SHINGLES_PER_BLOCK), dtype=np.uint64)
+    ends = np.cumsum(counts)
+    row = 0
+    while row < len(texts):
+        # Bloque de mensajes con a lo sumo SHINGLES_PER_BLOCK shingles (minimo uno)
+        start = ends[row - 1] if row else 0
+        last = max(row + 1, int(np.searchsorted(ends, start + SHINGLES_PER_BLOCK, side="right")))
+        block = values[start:ends[last - 1]]
+        out = hashed[:, :len(block)] if len(block) <= SHINGLES_PER_BLOCK else None
+        out = np.multiply(_HASH_A[:, None], block[None, :], out=out)
+        out += _HASH_B[:, None]
+        offsets = np.concatenate(([0], ends[row:last - 1] - start))
+        signatures[row:last] = np.minimum.reduceat(out, offsets, axis=1).T
+        row = last
+    return signatures
+
+
+def near_duplicate_roots(signatures, threshold=NEAR_DUPLICATE_THRESHOLD):
+    # LSH por bandas: candidatos = mismo hash en alguna banda; se confirman
+    # comparando firmas. Devuelve para cada fila la fila que la representa
+    n = len(signatures)
+    rows = np.arange(n)
+    rows_per_band = NUM_PERM // BANDS
+    pairs = []
+    for band in range(BANDS):
+        keys = (signatures[:, band * rows_per_band:(band + 1) * rows_per_band] * _BAND_MIX).sum(axis=1)
+        _, first, bucket = np.unique(keys, return_index=True, return_inverse=True)
+        heads = first[bucket]
+        candidates = rows[heads != rows]
+        if len(candidates):
+            pairs.append(np.stack([candidates, heads[candidates]]))
+    if not pairs:
+        return rows
+
+    left, right = np.concatenate(pairs, axis=1)
+    similar = _similarity(signatures[left], signatures[right]) >= threshold
+    left, right = left[similar], right[similar]
+
+    # Componentes conexas: cada fila toma la menor etiqueta de sus vecinos
+    roots = rows.copy()
+    while True:
+        updated = roots.copy()
+        np.minimum.at(updated, left, roots[right])
+        np.minimum.at(updated, right, roots[left])
+        updated = updated[updated]
+        if np.array_equal(updated, roots):
+            break
+        roots = updated
+
+    # Las cadenas (a~b, b~c) pueden unir mensajes distintos: solo se colapsa
+    # lo que se parece al representante del grupo
+    apart = _similarity(signatures, signatures[roots]) < threshold
+    roots[apart] = rows[apart]
+    return roots
+
+
+def _similarity(a, b):
+    # Fraccion de permutaciones con el mismo minimo ~ Jaccard de los shingles
+    return (a == b).mean(axis=1)
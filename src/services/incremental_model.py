@@ -0,0 +1,273 @@
+import os
+import re
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+
+from services.clustering import centroid_scores, topic_scores
+
+
+CHAT_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,64}")
+# Motores con ajuste parcial (partial_fit)
+INCREMENTAL_METHODS = ("kmeans", "lda")
+# Cambia cuando cambian los atributos guardados; un modelo de otra version
+# se descarta y se vuelve a entrenar desde cero
+FORMAT_VERSION = 2
+# Locks compartidos por hash del chat: memoria fija sin importar cuantos chats haya
+LOCK_STRIPES = 64
+
+
+def message_hashes(df):
+    # Identifica cada mensaje por fecha, usuario y texto original
+    keys = pd.DataFrame({
+        "fecha_hora": df["fecha_hora"],
+        "usuario": df["usuario"].astype(str),
+        "mensaje_original": df["mensaje_original"],
+    })
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy()
+
+
+def feature_index(term, n_features):
+    # Mismo indice que asigna HashingVectorizer a cada termino
+    from sklearn.utils import murmurhash3_32
+    return abs(murmurhash3_32(term, seed=0)) % n_features
+
+
+class IncrementalTopicModel:
+    def __init__(
+        self,
+        chat_id,
+        vectorizer_config,
+        method="lda",
+        n_groups=5,
+        n_features=2 ** 18,
+        drift_threshold=0.25,
+        batch_size=1024
+    ):
+        if method not in INCREMENTAL_METHODS:
+            raise ValueError(f"Método sin ajuste incremental: {method}")
+        self.format_version = FORMAT_VERSION
+        self.chat_id = chat_id
+        self.vectorizer_config = vectorizer_config
+        self.method = method
+        self.n_groups = n_groups
+        self.n_features = n_features
+        self.drift_threshold = drift_threshold
+        self.batch_size = batch_size
+
+        self.model = None
+        self.baseline = None
+        # Hashes ya vistos (ordenados) con el grupo y puntaje que recibieron
+        self.seen = np.empty(0, dtype=np.uint64)
+        self.clusters = np.empty(0, dtype=np.int64)
+        self.scores = np.empty(0, dtype=np.float64)
+        # Vocabulario que crece con cada lote: indice hash -> termino
+        self.vocabulary = {}
+        self.version = 0
+
+    def matches(self, vectorizer_config, method, n_groups, n_features):
+        return (
+            self.vectorizer_config.fingerprint == vectorizer_config.fingerprint
+            and self.method == method
+            and self.n_groups == n_groups
+            and self.n_features == n_features
+        )
+
+    def update(self, df):
+        hashes = message_hashes(df)
+        is_new = ~np.isin(hashes, self.seen)
+        n_new = int(is_new.sum())
+        texts = df["mensaje_limpio"]
+        vectorizer = self._vectorizer()
+
+        drift = None
+        refit = self.model is None
+        if not refit and n_new:
+            # Solo los mensajes nuevos: el costo depende del delta
+            X_new = vectorizer.transform(texts[is_new])
+            drift = self._drift(X_new)
+            refit = drift > self.drift_threshold
+            if not refit:
+                self._partial_fit(X_new, len(self.seen) + n_new)
+                self._learn_terms(vectorizer, texts[is_new])
+                self._remember(hashes[is_new], *self._predict(X_new))
+
+        if refit:
+            X = vectorizer.transform(texts)
+            self._fit(X)
+            self.vocabulary = {}
+            self._learn_terms(vectorizer, texts)
+            self.seen = np.empty(0, dtype=np.uint64)
+            self.clusters = np.empty(0, dtype=np.int64)
+            self.scores = np.empty(0, dtype=np.float64)
+            self._remember(hashes, *self._predict(X))
+
+        if refit or n_new:
+            self.version += 1
+
+        info = {
+            "chat_id": self.chat_id,
+            "version": self.version,
+            "new_messages": n_new,
+            "total_messages": int(len(self.seen)),
+            "refit": bool(refit),
+            "drift": None if drift is None else round(float(drift), 4),
+        }
+        # Los mensajes anteriores conservan el grupo que recibieron al llegar;
+        # solo un reajuste por deriva vuelve a clasificar todo el historial
+        positions = np.searchsorted(self.seen, hashes)
+        return self.clusters[positions], self.scores[positions], self._keywords(), info
+
+    def _remember(self, hashes, clusters, scores):
+        unique, first = np.unique(hashes, return_index=True)
+        at = np.searchsorted(self.seen, unique)
+        self.seen = np.insert(self.seen, at, unique)
+        self.clusters = np.insert(self.clusters, at, np.asarray(clusters)[first])
+        self.scores = np.insert(self.scores, at, np.asarray(scores)[first])
+
+    def _vectorizer(self):
+        # KMeans trabaja con vectores normalizados, LDA con conteos
+        norm = "l2" if self.method == "kmeans" else None
+        return self.vectorizer_config.make_hashing_vectorizer(self.n_features, norm=norm)
+
+    def _fit(self, X):
+        n_groups = self.n_groups
+        if X.shape[0] < n_groups:
+            # Ajustar el número de grupos si hay pocos mensajes
+            n_groups = min(X.shape[0], 3)
+
+        # sklearn se importa al ajustar, no al levantar el servidor
+        from sklearn.cluster import MiniBatchKMeans
+        from sklearn.decomposition import LatentDirichletAllocation
+
+        if self.method == "kmeans":
+            self.model = MiniBatchKMeans(
+                n_clusters=n_groups,
+                random_state=42,
+                batch_size=self.batch_size,
+                n_init=3
+            )
+            self.model.fit(X)
+            self.baseline = self._kmeans_cost(X)
+        else:
+            self.model = LatentDirichletAllocation(
+                n_components=n_groups,
+                learning_method="online",
+                batch_size=self.batch_size,
+                total_samples=X.shape[0],
+                random_state=42
+            )
+            self.model.fit(X)
+            self.baseline = self._lda_cost(X)
+
+    def _partial_fit(self, X_new, total_samples):
+        if self.method == "lda":
+            self.model.total_samples = total_samples
+        self.model.partial_fit(X_new)
+
+    def _drift(self, X_new):
+        # Cuanto peor explica el modelo actual los mensajes nuevos
+        if self.method == "kmeans":
+            current = self._kmeans_cost(X_new)
+        else:
+            current = self._lda_cost(X_new)
+        if current is None or not self.baseline:
+            return 0.0
+        return current / self.baseline - 1
+
+    def _kmeans_cost(self, X):
+        return -self.model.score(X) / X.shape[0]
+
+    def _lda_cost(self, X):
+        # Log-verosimilitud negativa por palabra; a diferencia de perplexity()
+        # no depende del tamaño del lote, asi que se puede comparar
+        X = X.tocoo()
+        if X.nnz == 0:
+            return None
+        theta = self.model.transform(X.tocsr())
+        components = self.model.components_
+        phi = components / components.sum(axis=1, keepdims=True)
+        probs = np.einsum("ij,ji->i", theta[X.row], phi[:, X.col])
+        return -(X.data * np.log(probs)).sum() / X.data.sum()
+
+    def _predict(self, X):
+        # Grupo y puntaje de representatividad de cada mensaje
+        if self.method == "kmeans":
+            distances = self.model.transform(X)
+            clusters = distances.argmin(axis=1)
+            return clusters, centroid_scores(distances, clusters)
+        doc_topic = self.model.transform(X)
+        return doc_topic.argmax(axis=1), topic_scores(doc_topic)
+
+    def _learn_terms(self, vectorizer, texts):
+        analyzer = vectorizer.build_analyzer()
+        terms = set()
+        for text in texts:
+            terms.update(analyzer(text))
+        for term in terms:
+            self.vocabulary.setdefault(feature_index(term, self.n_features), term)
+
+    def _keywords(self, n=20):
+        if self.method == "kmeans":
+            weights = self.model.cluster_centers_
+        else:
+            weights = self.model.components_
+
+        keywords = {}
+        for i, row in enumerate(weights):
+            top_indices = row.argsort()[::-1]
+            terms = []
+            for idx in top_indices:
+                if row[idx] <= 0 or len(terms) == n:
+                    break
+                term = self.vocabulary.get(int(idx))
+                if term is not None:
+                    terms.append(term)
+            keywords[i] = terms
+        return keywords
+
+
+class TopicModelStore:
+    def __init__(self, directory):
+        self.directory = directory
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+    @staticmethod
+    def validate_chat_id(chat_id):
+        if not CHAT_ID_PATTERN.fullmatch(chat_id):
+            raise ValueError(f"Identificador de chat inválido: {chat_id}")
+
+    def lock(self, chat_id):
+        # Un solo update a la vez por chat (dos chats pueden compartir lock)
+        return self._locks[hash(chat_id) % LOCK_STRIPES]
+
+    def _path(self, chat_id):
+        self.validate_chat_id(chat_id)
+        return os.path.join(self.directory, f"{chat_id}.joblib")
+
+    def load(self, chat_id):
+        path = self._path(chat_id)
+        if not os.path.exists(path):
+            return None
+        import joblib
+        model = joblib.load(path)
+        if getattr(model, "format_version", None) != FORMAT_VERSION:
+            return None
+        return model
+
+    def save(self, model):
+        path = self._path(model.chat_id)
+        # El directorio se crea con el primer modelo, no al importar el servidor
+        os.makedirs(self.directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        os.close(fd)
+        import joblib
+        try:
+            joblib.dump(model, temp_path)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
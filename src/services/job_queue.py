@@ -0,0 +1,149 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class JobManagerClosedError(Exception):
+    pass
+
+
+@dataclass
+class Job:
+    id: str
+    state: str = "queued"  # queued, running, done, error
+    stage: str = "queued"
+    progress: float = 0.0
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    @property
+    def finished(self):
+        return self.state in ("done", "error")
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "state": self.state,
+            "stage": self.stage,
+            "progress": round(self.progress, 3),
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobManager:
+    def __init__(self, max_workers=2, max_queue=10, result_ttl=3600, on_discard=None):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.result_ttl = result_ttl
+        # Se llama con cada trabajo terminado que se descarta (p. ej. para
+        # borrar los archivos de su resultado)
+        self.on_discard = on_discard
+        self.closed = False
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="analysis-job"
+        )
+        self._jobs = {}
+        # Trabajos que aun no empiezan: id -> (trabajo, future, cleanup)
+        self._waiting = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def submit(
+        self, fn: Callable, *args, cleanup: Optional[Callable] = None, **kwargs
+    ) -> Job:
+        with self._lock:
+            if self.closed:
+                raise JobManagerClosedError("El servicio de trabajos se está deteniendo")
+            self._prune()
+            # Los que se ejecutan mas los que esperan en la cola
+            if self._pending >= self.max_workers + self.max_queue:
+                raise QueueFullError("La cola de análisis está llena")
+
+            job = Job(id=uuid.uuid4().hex)
+            self._jobs[job.id] = job
+            self._pending += 1
+            # Dentro del lock: _run no puede empezar antes de quedar registrado
+            future = self._executor.submit(self._run, job, fn, args, kwargs, cleanup)
+            self._waiting[job.id] = (job, future, cleanup)
+        return job
+
+    def get(self, job_id) -> Optional[Job]:
+        with self._lock:
+            self._prune()
+            return self._jobs.get(job_id)
+
+    def queued_count(self):
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job.state == "queued")
+
+    def shutdown(self):
+        with self._lock:
+            self.closed = True
+            waiting = list(self._waiting.values())
+            self._waiting.clear()
+            finished = [job for job in self._jobs.values() if job.finished]
+            for job in finished:
+                del self._jobs[job.id]
+
+        for job in finished:
+            self._discard(job)
+
+        # Los que no empezaron no pasan por _run: se cierran aqui
+        for job, future, cleanup in waiting:
+            if not future.cancel():
+                continue
+            job.error = "El servicio se detuvo antes de iniciar el trabajo"
+            job.state = "error"
+            job.finished_at = time.time()
+            with self._lock:
+                self._pending -= 1
+            if cleanup is not None:
+                cleanup()
+        self._executor.shutdown(wait=False)
+
+    def _run(self, job, fn, args, kwargs, cleanup):
+        def report(stage, progress):
+            job.stage = stage
+            job.progress = progress
+
+        with self._lock:
+            self._waiting.pop(job.id, None)
+        job.state = "running"
+        try:
+            job.result = fn(*args, progress=report, **kwargs)
+            job.state = "done"
+            report("done", 1.0)
+        except Exception as e:
+            job.error = str(e)
+            job.state = "error"
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self._pending -= 1
+            if cleanup is not None:
+                cleanup()
+
+    def _prune(self):
+        # Descarta los resultados que nadie recogio a tiempo
+        limit = time.time() - self.result_ttl
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished and job.finished_at < limit
+        ]
+        for job_id in expired:
+            self._discard(self._jobs.pop(job_id))
+
+    def _discard(self, job):
+        if self.on_discard is not None and job.state == "done":
+            self.on_discard(job)
@@ -0,0 +1,235 @@
+import json
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+try:
+    import orjson
+except ImportError:  # Sin orjson se usa el json estandar
+    orjson = None
+
+
+RECORDS_PER_CHUNK = 1000
+READ_BLOCK_SIZE = 1 << 16
+
+
+def dumps(obj) -> bytes:
+    if orjson is not None:
+        # Claves no str (p.ej. numeros de tema) igual que json.dumps
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(content):
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+@dataclass
+class TopicStream:
+    topic: int
+    keywords: List[str]
+    message_count: int
+    include_messages: bool
+    # Listas de mensajes (dicts) que se serializan de a una
+    chunks: Iterable[list]
+    # Posiciones de los mensajes mas representativos del tema
+    representatives: Optional[List[int]] = None
+
+
+def topics_from_reports(reports, include_messages=True, chunk_size=RECORDS_PER_CHUNK):
+    for report in reports:
+        chunks = ()
+        if include_messages:
+            chunks = (
+                report.messages.iloc[start:start + chunk_size].to_dict("records")
+                for start in range(0, report.message_count, chunk_size)
+            )
+        yield TopicStream(
+            report.cluster,
+            report.keywords[:10],
+            report.message_count,
+            include_messages,
+            chunks,
+            report.ranking
+        )
+
+
+def topics_from_index(index, file=None, include_messages=True):
+    # Temas de un resultado en cache; los mensajes se leen y parsean de a un bloque
+    for data in index["topics"]:
+        chunks = ()
+        if include_messages and file is not None:
+            chunks = (
+                _read_chunk(file, start, end)
+                for _, start, end in data["chunks"]
+            )
+        yield TopicStream(
+            data["topic"],
+            data["keywords"],
+            data["message_count"],
+            include_messages,
+            chunks,
+            data["representative_messages"]
+        )
+
+
+def _read_chunk(file, start, end):
+    file.seek(start)
+    return loads(b"[" + file.read(end - start) + b"]")
+
+
+def read_messages(file, data, positions):
+    # Mensajes de un tema en cache (posicion -> dict); solo se leen los bloques
+    # que contienen alguna de las posiciones pedidas
+    wanted = sorted(set(positions))
+    records = {}
+    chunks = data["chunks"]
+    for i, (first, start, end) in enumerate(chunks):
+        last = chunks[i + 1][0] if i + 1 < len(chunks) else data["message_count"]
+        inside = [position for position in wanted if first <= position < last]
+        if inside:
+            chunk = _read_chunk(file, start, end)
+            for position in inside:
+                records[position] = chunk[position - first]
+    return records
+
+
+def iter_cached_json(meta, index, file, block_size=READ_BLOCK_SIZE):
+    # Los temas del JSON en cache se envian tal cual; solo se rearma la cabecera
+    yield dumps(meta)[:-1] + b',"topics":{'
+    file.seek(index["topics_offset"])
+    while block := file.read(block_size):
+        yield block
+
+
+class StreamEncoder:
+    def __init__(self, meta, include_messages=True):
+        self.meta = meta
+        self.include_messages = include_messages
+        # Bytes emitidos hasta ahora
+        self.size = 0
+
+    def encode(self, kind, value):
+        data = getattr(self, "_" + kind)(value)
+        self.size += len(data)
+        return data
+
+    def _topic_end(self, topic):
+        return b""
+
+    def _end(self, value):
+        return b""
+
+
+class JsonEncoder(StreamEncoder):
+    def __init__(self, meta, include_messages=True, index=None):
+        super().__init__(meta, include_messages)
+        # Si se pasa, se anota donde queda cada bloque de mensajes para luego
+        # leerlos sin parsear todo el documento
+        self.index = index
+        self.topics = 0
+
+    def _start(self, value):
+        header = dumps(self.meta)[:-1] + b',"topics":{'
+        if self.index is not None:
+            self.index.update(meta=self.meta, topics_offset=len(header), topics=[])
+        return header
+
+    def _topic(self, topic):
+        self.messages = topic.include_messages and self.include_messages
+        self.records = 0
+        data = (
+            (b"," if self.topics else b"")
+            + dumps(str(topic.topic))
+            + b':{"keywords":' + dumps(topic.keywords)
+            + b',"message_count":' + str(topic.message_count).encode()
+        )
+        self.topics += 1
+        if topic.representatives is not None:
+            data += b',"representative_messages":' + dumps(topic.representatives)
+        if self.messages:
+            data += b',"messages":['
+        if self.index is not None:
+            self.chunks = []
+            self.index["topics"].append({
+                "topic": topic.topic,
+                "keywords": topic.keywords,
+                "message_count": topic.message_count,
+                "representative_messages": topic.representatives,
+                # [primer mensaje, inicio, fin] de cada bloque
+                "chunks": self.chunks,
+            })
+        return data
+
+    def _records(self, records):
+        if not self.messages:
+            return b""
+        separator = b"," if self.records else b""
+        data = separator + b",".join(records)
+        if self.index is not None:
+            self.chunks.append([self.records, self.size + len(separator), self.size + len(data)])
+        self.records += len(records)
+        return data
+
+    def _topic_end(self, topic):
+        return b"]}" if self.messages else b"}"
+
+    def _end(self, value):
+        return b"}}"
+
+
+class NdjsonEncoder(StreamEncoder):
+    # Una linea por objeto: cabecera, luego cada tema seguido de sus mensajes
+    def _start(self, value):
+        return dumps({"type": "analysis", **self.meta}) + b"\n"
+
+    def _topic(self, topic):
+        self.messages = topic.include_messages and self.include_messages
+        header = {
+            "type": "topic",
+            "topic": topic.topic,
+            "keywords": topic.keywords,
+            "message_count": topic.message_count,
+        }
+        if topic.representatives is not None:
+            header["representative_messages"] = topic.representatives
+        # Cada mensaje ya serializado se reusa: solo se le antepone tipo y tema
+        self.prefix = b'{"type":"message","topic":' + dumps(topic.topic) + b","
+        return dumps(header) + b"\n"
+
+    def _records(self, records):
+        if not self.messages:
+            return b""
+        return b"".join(self.prefix + record[1:] + b"\n" for record in records)
+
+
+def iter_events(topics):
+    yield "start", None
+    for topic in topics:
+        yield "topic", topic
+        for chunk in topic.chunks:
+            if chunk:
+                # Cada mensaje se serializa una sola vez para todos los formatos
+                yield "records", [dumps(record) for record in chunk]
+        yield "topic_end", topic
+    yield "end", None
+
+
+def iter_encoded(encoder, topics, copy=None):
+    # copy: (encoder, write) que recibe la misma pasada en otro formato, p. ej.
+    # el JSON de la cache mientras se envia la respuesta
+    for kind, value in iter_events(topics):
+        if copy is not None:
+            copy[1](copy[0].encode(kind, value))
+        data = encoder.encode(kind, value)
+        if data:
+            yield data
+
+
+def iter_json(meta, topics, index=None):
+    return iter_encoded(JsonEncoder(meta, index=index), topics)
+
+
+def iter_ndjson(meta, topics):
+    return iter_encoded(NdjsonEncoder(meta), topics)
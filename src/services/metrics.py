@@ -0,0 +1,251 @@
+import io
+import os
+import resource
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+# Limites (segundos) de los histogramas de duracion
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+PROFILE_LINES = 40
+
+
+class Timings:
+    # Etapas y contadores de una peticion (o trabajo)
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def add_stage(self, name, seconds):
+        # Una etapa que se repite (p.ej. por lotes) acumula su tiempo
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def record(self, name, value):
+        with self._lock:
+            self.counters[name] = value
+
+    def to_dict(self):
+        rss = current_rss_bytes()
+        with self._lock:
+            return {
+                "total_seconds": round(time.perf_counter() - self.start, 4),
+                "stages": {name: round(seconds, 4) for name, seconds in self.stages.items()},
+                "counters": dict(self.counters),
+                "rss_mb": round(rss / 2 ** 20, 1),
+                "peak_rss_mb": round(max(rss, peak_rss_bytes()) / 2 ** 20, 1),
+            }
+
+
+class MetricsRegistry:
+    # Contadores, valores e histogramas del proceso, en formato de Prometheus
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._types = {}
+        self._help = {}
+        self._values = defaultdict(int)
+        self._histograms = {}
+
+    def describe(self, name, kind, help_text):
+        self._types[name] = kind
+        self._help[name] = help_text
+
+    def inc(self, name, value=1, **labels):
+        self._types.setdefault(name, "counter")
+        with self._lock:
+            self._values[name, _label_key(labels)] += value
+
+    def set(self, name, value, **labels):
+        self._types.setdefault(name, "gauge")
+        with self._lock:
+            self._values[name, _label_key(labels)] = value
+
+    def observe(self, name, value, **labels):
+        self._types.setdefault(name, "histogram")
+        with self._lock:
+            counts = self._histograms.setdefault(
+                (name, _label_key(labels)), [0] * (len(self.buckets) + 2)
+            )
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            counts[-2] += value
+            counts[-1] += 1
+
+    def render(self):
+        with self._lock:
+            values = sorted(self._values.items())
+            histograms = sorted(self._histograms.items())
+
+        lines = []
+        described = set()
+
+        def header(name):
+            if name not in described:
+                described.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} {self._types.get(name, 'untyped')}")
+
+        for (name, labels), value in values:
+            header(name)
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        for (name, labels), counts in histograms:
+            header(name)
+            for bound, count in zip((*self.buckets, "+Inf"), (*counts[:len(self.buckets)], counts[-1])):
+                bucket_labels = _format_labels(labels + (("le", str(bound)),))
+                lines.append(f"{name}_bucket{bucket_labels} {count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(counts[-2])}")
+            lines.append(f"{name}_count{_format_labels(labels)} {counts[-1]}")
+        return "\n".join(lines) + "\n"
+
+
+def _label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+REGISTRY = MetricsRegistry()
+REGISTRY.describe("chat_stage_seconds", "histogram", "Duracion de cada etapa del analisis")
+
+# Timings de la peticion en curso; los hilos del threadpool reciben una copia
+# del contexto, los trabajos la fijan en su propio hilo (ver collect)
+_current = ContextVar("chat_timings", default=None)
+
+
+@contextmanager
+def collect():
+    timings = Timings()
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def stage(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        REGISTRY.observe("chat_stage_seconds", elapsed, stage=name)
+        timings = _current.get()
+        if timings is not None:
+            timings.add_stage(name, elapsed)
+
+
+def count(name, value=1):
+    # Acumulado del proceso (chat_<name>_total) y de la peticion
+    REGISTRY.inc(f"chat_{name}_total", value)
+    timings = _current.get()
+    if timings is not None:
+        timings.count(name, value)
+
+
+def record(name, value):
+    # Valor de la ultima ejecucion (vocabulario, iteraciones, ...)
+    REGISTRY.set(f"chat_last_{name}", value)
+    timings = _current.get()
+    if timings is not None:
+        timings.record(name, value)
+
+
+def counted(iterable, name):
+    # Cuenta los elementos a medida que se consumen
+    total = 0
+    try:
+        for item in iterable:
+            total += 1
+            yield item
+    finally:
+        count(name, total)
+
+
+def current_rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # Fuera de Linux no hay RSS actual barato: se usa el pico
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss viene en KB en Linux y en bytes en macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Profile:
+    # Perfil del hilo actual: pyinstrument (muestreo) si esta instalado,
+    # si no cProfile (determinista, mas costoso). La respuesta dice cual fue
+    def __init__(self):
+        try:
+            from pyinstrument import Profiler
+            self.profiler = Profiler()
+            self.name = "pyinstrument"
+        except ImportError:
+            import cProfile
+            self.profiler = cProfile.Profile()
+            self.name = "cProfile"
+        self.sampling = self.name == "pyinstrument"
+        self.report = None
+
+    def __enter__(self):
+        if self.sampling:
+            self.profiler.start()
+        else:
+            self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc):
+        if self.sampling:
+            self.profiler.stop()
+            self.report = self.profiler.output_text(unicode=True, color=False)
+        else:
+            import pstats
+            self.profiler.disable()
+            output = io.StringIO()
+            pstats.Stats(self.profiler, stream=output).sort_stats("cumulative").print_stats(PROFILE_LINES)
+            self.report = output.getvalue()
+
+    def to_dict(self):
+        data = {"profiler": self.name, "sampling": self.sampling, "report": self.report}
+        if not self.sampling:
+            data["warning"] = (
+                "cProfile mide cada llamada: el análisis perfilado puede tardar varias veces "
+                "más y las funciones cortas aparecen sobrerrepresentadas. Instale pyinstrument "
+                "(requirements-optional.txt) para un perfil por muestreo"
+            )
+        return data
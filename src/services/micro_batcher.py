@@ -0,0 +1,88 @@
+import asyncio
+
+
+class BatcherClosedError(Exception):
+    pass
+
+
+# Marca en la cola: lo que llego antes se procesa y el ciclo termina
+_STOP = object()
+
+
+class MicroBatcher:
+    # Junta los pedidos concurrentes y los procesa con una sola llamada a fn
+    def __init__(self, fn, max_batch=256, max_wait=0.0):
+        self.fn = fn
+        self.max_batch = max_batch
+        # Segundos que se espera por mas pedidos; con 0 solo se juntan los
+        # que ya llegaron mientras se procesaba el lote anterior
+        self.max_wait = max_wait
+        self._loop = None
+        self._queue = None
+        self._task = None
+        self._closed = False
+
+    async def submit(self, item):
+        if self._closed:
+            raise BatcherClosedError("El clasificador se cerró")
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Primer uso (o un event loop nuevo): la cola vive en este loop
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run())
+        future = loop.create_future()
+        self._queue.put_nowait((item, future))
+        return await future
+
+    async def _next_batch(self):
+        # Devuelve (lote, si hay que terminar despues de procesarlo)
+        batch = []
+        first = await self._queue.get()
+        if first is _STOP:
+            return batch, True
+        batch.append(first)
+        deadline = self._loop.time() + self.max_wait
+        while len(batch) < self.max_batch:
+            try:
+                entry = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                remaining = deadline - self._loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    entry = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            if entry is _STOP:
+                return batch, True
+            batch.append(entry)
+        return batch, False
+
+    async def _run(self):
+        stop = False
+        while not stop:
+            batch, stop = await self._next_batch()
+            if not batch:
+                continue
+            try:
+                # fn (preprocesar, vectorizar, predecir) corre en un hilo para
+                # no frenar el event loop mientras tanto
+                results = await self._loop.run_in_executor(
+                    None, self.fn, [item for item, _ in batch]
+                )
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def close(self):
+        # Puede llamarse desde otro hilo (p.ej. al desalojar de una cache).
+        # Los pedidos ya encolados se terminan de procesar; los nuevos fallan
+        self._closed = True
+        if self._task is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, _STOP)
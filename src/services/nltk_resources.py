@@ -0,0 +1,34 @@
+# Paquete de nltk.download -> ruta que busca nltk.data.find (acepta .zip)
+RESOURCES = {
+    "wordnet": "corpora/wordnet",
+    "omw-1.4": "corpora/omw-1.4",
+    "punkt": "tokenizers/punkt",
+    "stopwords": "corpora/stopwords",
+}
+
+
+def missing_resources():
+    # Solo revisa el disco: no usa la red
+    import nltk
+
+    missing = []
+    for package, path in RESOURCES.items():
+        try:
+            nltk.data.find(path)
+        except LookupError:
+            missing.append(package)
+    return missing
+
+
+def ensure_resources(download=False):
+    missing = missing_resources()
+    if missing and download:
+        import nltk
+        for package in missing:
+            nltk.download(package, quiet=True)
+        missing = missing_resources()
+    if missing:
+        raise LookupError(
+            f"Faltan recursos de NLTK: {', '.join(missing)}. "
+            f"Instalar con: python -m nltk.downloader {' '.join(missing)}"
+        )
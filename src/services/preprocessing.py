@@ -0,0 +1,90 @@
+import math
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import pandas as pd
+
+from services.text_cleaner import MessageCleaner
+
+
+# Estado propio de cada proceso del pool, creado una sola vez por worker
+_worker_cleaner = None
+_worker_lemmatize = None
+
+
+def _word_tokenize(text):
+    # Primera llamada: importa NLTK (tarda segundos) y se reemplaza por el
+    # tokenizador real, sin costo extra en las siguientes
+    global _word_tokenize
+    from nltk.tokenize import word_tokenize
+    _word_tokenize = word_tokenize
+    return word_tokenize(text)
+
+
+def preprocess_text(text, cleaner, lemmatize):
+    if pd.isna(text):
+        return ""
+
+    text_clean = cleaner.clean(text)
+
+    tokens = _word_tokenize(text_clean)
+
+    lemmatized = [lemmatize(token) for token in tokens]
+
+    return ' '.join(lemmatized)
+
+
+def _init_worker(lemma_cache_size):
+    global _worker_cleaner, _worker_lemmatize
+    from nltk.stem import WordNetLemmatizer
+    _worker_cleaner = MessageCleaner()
+    _worker_lemmatize = lru_cache(maxsize=lemma_cache_size)(
+        WordNetLemmatizer().lemmatize
+    )
+    # Fuerza la carga de WordNet antes de recibir trabajo
+    _worker_lemmatize("mensaje")
+
+
+def _preprocess_chunk(texts):
+    return [
+        preprocess_text(text, _worker_cleaner, _worker_lemmatize)
+        for text in texts
+    ]
+
+
+class ParallelPreprocessor:
+    def __init__(self, workers, chunk_size=2000, lemma_cache_size=100000):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.lemma_cache_size = lemma_cache_size
+        self._executor = None
+
+    def _get_executor(self):
+        # El pool se crea al primer uso y se reutiliza entre peticiones
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self.lemma_cache_size,)
+            )
+        return self._executor
+
+    def map(self, texts):
+        texts = list(texts)
+        if not texts:
+            return []
+
+        # Reparte el lote entre todos los workers sin pasar de chunk_size
+        size = min(self.chunk_size, math.ceil(len(texts) / self.workers))
+        chunks = [texts[i:i + size] for i in range(0, len(texts), size)]
+
+        results = []
+        # executor.map devuelve los resultados en el orden de entrada
+        for processed in self._get_executor().map(_preprocess_chunk, chunks):
+            results.extend(processed)
+        return results
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
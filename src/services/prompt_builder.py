@@ -0,0 +1,80 @@
+import re
+
+import numpy as np
+
+
+# Candidatos por tema que se guardan ordenados por representatividad
+RANKING_SIZE = 200
+DEFAULT_TOKEN_BUDGET = 1500
+MAX_MESSAGE_CHARS = 400
+DUPLICATE_THRESHOLD = 0.8
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def estimate_tokens(text):
+    # ~4 caracteres por token; deterministico y sin dependencias
+    return len(text) // 4 + 1
+
+
+def rank_by_score(scores, limit=RANKING_SIZE):
+    # Mayor puntaje primero; a igual puntaje, el mensaje anterior
+    scores = np.asarray(scores, dtype=float)
+    candidates = np.arange(len(scores))
+    if len(scores) > limit:
+        # Solo se ordena lo que supera el umbral del puesto limit (con empates)
+        threshold = np.partition(scores, len(scores) - limit)[len(scores) - limit]
+        candidates = np.flatnonzero(scores >= threshold)
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order[:limit]].tolist()
+
+
+def even_ranking(n_messages, limit=RANKING_SIZE):
+    # Sin puntajes: muestra pareja a lo largo del tema
+    if n_messages <= limit:
+        return list(range(n_messages))
+    return np.unique(np.linspace(0, n_messages - 1, limit).round().astype(int)).tolist()
+
+
+def _words(line):
+    # Solo el texto del mensaje ("hora - usuario: mensaje")
+    text = line.split(": ", 1)[-1].lower()
+    return frozenset(WORD_PATTERN.findall(text)) or frozenset([text.strip()])
+
+
+def _is_duplicate(words, chosen):
+    for other in chosen:
+        union = len(words | other)
+        if union and len(words & other) / union >= DUPLICATE_THRESHOLD:
+            return True
+    return False
+
+
+def select_messages(
+    messages,
+    ranking=None,
+    token_budget=DEFAULT_TOKEN_BUDGET,
+    max_chars=MAX_MESSAGE_CHARS
+):
+    # messages: lista (o dict posicion -> linea); ranking: posiciones de
+    # mejor a peor. Devuelve las elegidas en orden cronologico.
+    if ranking is None:
+        ranking = even_ranking(len(messages))
+
+    selected = []
+    chosen_words = []
+    used = 0
+    for position in ranking:
+        line = messages[position]
+        if len(line) > max_chars:
+            line = line[:max_chars] + "..."
+        tokens = estimate_tokens(line)
+        if used + tokens > token_budget:
+            continue
+        words = _words(line)
+        if _is_duplicate(words, chosen_words):
+            continue
+        selected.append((position, line))
+        chosen_words.append(words)
+        used += tokens
+    return [line for _, line in sorted(selected)]
@@ -0,0 +1,35 @@
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+        # rate: fichas por segundo; capacity: rafaga maxima
+        if rate is None or rate <= 0:
+            raise ValueError(f"La tasa debe ser mayor que cero: {rate}")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, amount):
+        # Descuenta ya y devuelve cuanto esperar: el saldo puede quedar
+        # negativo, asi los pedidos se atienden en orden de llegada
+        amount = min(amount, self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= amount
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    async def acquire(self, amount=1):
+        delay = self._reserve(amount)
+        if delay:
+            await asyncio.sleep(delay)
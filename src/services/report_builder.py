@@ -0,0 +1,121 @@
+from dataclasses import dataclass
+from typing import Any, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from services.chat_loader import format_date, format_messages
+from services.prompt_builder import rank_by_score
+
+
+@dataclass
+class ClusterReport:
+    cluster: int
+    keywords: List[str]
+    message_count: int
+    user_count: int
+    start: Any
+    end: Any
+    example_user: str
+    example_message: str
+    # Mensajes del tema ya formateados, por dia y en su orden original
+    messages: pd.DataFrame
+    # Posiciones en messages de los mas representativos, de mejor a peor
+    ranking: Optional[List[int]] = None
+
+
+def build_cluster_reports(df, keywords):
+    clusters = df["cluster"].astype(int)
+
+    # Una sola pasada de groupby para todas las estadisticas
+    stats = df.groupby(clusters, sort=True).agg(
+        message_count=("mensaje_original", "size"),
+        user_count=("usuario", "nunique"),
+        start=("fecha_hora", "min"),
+        end=("fecha_hora", "max"),
+        example_user=("usuario", "first"),
+        example_message=("mensaje_original", "first"),
+    )
+
+    # Un solo ordenamiento estable por tema y dia; cada tema queda contiguo
+    order = pd.DataFrame({
+        "cluster": clusters,
+        "dia": df["fecha_hora"].dt.normalize(),
+    }).sort_values(["cluster", "dia"], kind="stable", na_position="last").index
+    formatted = format_messages(df.loc[order])
+    bounds = np.searchsorted(
+        clusters.loc[order].to_numpy(), stats.index.to_numpy(), side="left"
+    )
+    ends = np.append(bounds[1:], len(formatted))
+
+    scores = None
+    if "cluster_score" in df:
+        scores = df["cluster_score"].loc[order].to_numpy()
+
+    reports = []
+    for (cluster, row), start, end in zip(stats.iterrows(), bounds, ends):
+        reports.append(ClusterReport(
+            cluster=int(cluster),
+            keywords=list(keywords[cluster]),
+            message_count=int(row["message_count"]),
+            user_count=int(row["user_count"]),
+            start=row["start"],
+            end=row["end"],
+            example_user=str(row["example_user"]),
+            example_message=row["example_message"],
+            messages=formatted.iloc[start:end],
+            ranking=None if scores is None else rank_by_score(scores[start:end]),
+        ))
+    return reports
+
+
+def render_topic_file(report):
+    header = (
+        f"TEMA {report.cluster+1}\n"
+        + "=" * 50 + "\n\n"
+        # Escribir las palabras claves
+        + "PALABRAS CLAVE DEL TEMA:\n"
+        + ", ".join(report.keywords) + "\n\n"
+        # Escribir estadisticas
+        + f"Total mensajes: {report.message_count}\n"
+        + f"Participantes: {report.user_count}\n"
+        + f"Período: {format_date(report.start)} a {format_date(report.end)}\n\n"
+        # Escribir mensajes
+        + "MENSAJES DEL TEMA:\n"
+        + "-" * 50 + "\n\n"
+    )
+
+    messages = report.messages
+    if messages.empty:
+        return header
+
+    # Cabecera [fecha] cada vez que cambia el dia
+    fechas = messages["fecha"]
+    day_headers = ("\n[" + fechas + "]\n").where(fechas.ne(fechas.shift()), "")
+    lines = (
+        day_headers + messages["hora"] + " - " + messages["usuario"]
+        + ": " + messages["mensaje_original"] + "\n"
+    )
+    return header + "".join(lines.tolist())
+
+
+def render_summary(reports):
+    parts = ["RESUMEN DE TEMAS\n", "=" * 50 + "\n\n"]
+    for report in reports:
+        parts.append(f"\nTEMA {report.cluster+1}:\n")
+        parts.append(f"- Mensajes: {report.message_count}\n")
+        parts.append(f"- Usuarios: {report.user_count}\n")
+        parts.append(f"- Palabras clave: {', '.join(report.keywords[:10])}\n")
+        parts.append("- Ejemplo mensaje:\n")
+        if report.message_count:
+            parts.append(
+                f"  {report.example_user}: {report.example_message[:100]}...\n"
+            )
+    return "".join(parts)
+
+
+def iter_report_files(reports):
+    # Mismos nombres que los archivos de save_results
+    for report in reports:
+        yield f"tema_{report.cluster+1}.txt", render_topic_file(report)
+    yield "resumen_temas.txt", render_summary(reports)
@@ -0,0 +1,186 @@
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from services.json_stream import dumps, loads
+
+
+HASH_BLOCK_SIZE = 1 << 20
+KEY_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+
+def hash_stream(stream, block_size=HASH_BLOCK_SIZE):
+    # Recorre el flujo una vez y lo deja listo para volver a leerlo
+    digest = hashlib.sha256()
+    stream.seek(0)
+    while block := stream.read(block_size):
+        digest.update(block)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    def __init__(self, directory, max_bytes=512 * 1024 * 1024, ttl=24 * 3600):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(content_hash, config_fingerprint, *params):
+        # params: todo lo que cambia el resultado (metodo, grupos, ...)
+        data = ":".join(str(value) for value in (content_hash, config_fingerprint, *params))
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        # Las claves llegan por la URL: solo se aceptan hashes sha256
+        if not KEY_PATTERN.fullmatch(key):
+            raise ValueError(f"Clave de cache inválida: {key}")
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _index_path(self, key):
+        # Donde empieza cada tema y cada bloque de mensajes dentro del JSON
+        return self._path(key)[:-len(".json")] + ".idx"
+
+    def _fresh(self, key):
+        path = self._path(key)
+        if os.path.getmtime(path) + self.ttl < time.time():
+            self.invalidate(key)
+            raise FileNotFoundError(path)
+        return path
+
+    def get(self, key):
+        try:
+            path = self._fresh(key)
+            with open(path, "rb") as f:
+                content = f.read()
+            # La fecha de modificacion marca el ultimo uso (desalojo LRU)
+            os.utime(path)
+            return content
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def open(self, key):
+        # Devuelve (indice, archivo abierto) o None; el archivo abierto se sigue
+        # pudiendo leer aunque la entrada se desaloje mientras se envia.
+        # Entradas sin indice (de versiones anteriores) cuentan como fallo
+        try:
+            with open(self._index_path(key), "rb") as f:
+                index = loads(f.read())
+        except (FileNotFoundError, ValueError):
+            return None
+        file = self.open_file(key)
+        if file is None:
+            return None
+        return index, file
+
+    def open_file(self, key):
+        # Solo el archivo, para quien ya tiene el indice (p. ej. en memoria)
+        try:
+            path = self._fresh(key)
+            file = open(path, "rb")
+            os.utime(path)
+            return file
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def put(self, key, content: bytes):
+        self.put_stream(key, [content])
+
+    def put_stream(self, key, chunks, index=None):
+        with self.writer(key, index) as f:
+            for chunk in chunks:
+                f.write(chunk)
+
+    @contextmanager
+    def writer(self, key, index=None):
+        # Escritura atomica: nunca se lee un archivo a medio escribir. index se
+        # completa mientras se escribe y se guarda al final, antes que el JSON.
+        # Si quien escribe se corta (p. ej. el cliente cierra la conexion) no
+        # queda nada en la cache
+        path = self._path(key)
+        # El directorio se crea con la primera entrada, no al importar el servidor
+        os.makedirs(self.directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                yield f
+            if index is not None:
+                self._write_index(key, index)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self._evict()
+
+    def _write_index(self, key, index):
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(dumps(index))
+            os.replace(temp_path, self._index_path(key))
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def invalidate(self, key):
+        try:
+            path = self._path(key)
+        except ValueError:
+            return False
+        try:
+            os.remove(self._index_path(key))
+        except FileNotFoundError:
+            pass
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def clear(self):
+        removed = 0
+        for entry in self._entries():
+            if self.invalidate(entry[2]):
+                removed += 1
+        return removed
+
+    def _entries(self):
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return entries
+        for name in names:
+            if not name.endswith(".json"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name[:-len(".json")]))
+        return entries
+
+    def _evict(self):
+        with self._lock:
+            now = time.time()
+            entries = []
+            for modified, size, key in self._entries():
+                if modified + self.ttl < now:
+                    self.invalidate(key)
+                else:
+                    entries.append((modified, size, key))
+
+            # Borra primero las entradas usadas hace mas tiempo
+            total = sum(size for _, size, _ in entries)
+            for _, size, key in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                self.invalidate(key)
+                total -= size
@@ -0,0 +1,79 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+
+# Reglas de limpieza, en el mismo orden en que se aplicaban con re.sub.
+# El segundo valor indica si la regla solo elimina palabras completas
+# (\b...\b sobre caracteres de palabra): al borrar una palabra sus vecinos
+# siguen siendo separadores, asi que reglas consecutivas de este tipo se
+# pueden fusionar en una sola pasada sin cambiar el resultado.
+CLEANING_RULES = [
+    (r"[\U0001F300-\U0001F9FF]", False),  # Emojis
+    (r"\b(?:xd+|:v|v:|umu|uwu|:\'v|:\'\'v)\b", False),  # Emotes básicos
+    (r"http[s]?://\S+", False),  # URLs
+    (r"stk-\d+-wa\d+\.webp", False),  # Stickers
+    (r"img-\d+-wa\d+\.jpg", False),  # Imágenes
+    (r"<se editó este mensaje\.>", False),
+    (r"<multimedia omitido>", False),
+    (r"\bx\d+\b", True),
+    (r"\(archivo adjunto\)", False),
+    (r"zzz+", False),
+    (r"se eliminó este mensaje\.", False),
+    (r"\b(enlace|unir|unió|unido)\b", True),
+    (r"(añadió|añadiste)\b", False),
+    (r"\b(?:tmr|ctmr|ptm|ptmr|mrd|mrda|csm|ctm)\b", True),
+    (r"\b(?:xd+|XD+|xD+|Xd+)\b", True),
+    (r"\b(?:wtf|wdf|wtff|wdff)\b", True),
+    (r"\b(?:ps|pe|pe\'|pex|pz|pue|pueh)\b", True),
+    (r"\b(?:pls|plz|porfa)\b", True),
+    (r"\b(?:ok|okk|okey|oki|okis)\b", True),
+    (r"(?:\.{2,}|\?{2,}|\!{2,})", False),
+]
+
+
+class MessageCleaner:
+    def __init__(self, rules=CLEANING_RULES):
+        self.rules = list(rules)
+        self.passes = [re.compile(pattern) for pattern in self._merge_rules(self.rules)]
+
+        # Si ninguna regla coincide con el texto original ninguna pasada lo
+        # modifica, por lo que basta una sola busqueda para descartarlo.
+        self.trigger = re.compile("|".join(f"(?:{pattern})" for pattern, _ in self.rules))
+
+    @staticmethod
+    def _merge_rules(rules):
+        merged = []
+        group = []
+        for pattern, whole_word in rules:
+            if whole_word:
+                group.append(pattern)
+                continue
+            if group:
+                merged.append("|".join(f"(?:{p})" for p in group))
+                group = []
+            merged.append(pattern)
+        if group:
+            merged.append("|".join(f"(?:{p})" for p in group))
+        return merged
+
+    def clean(self, text):
+        if pd.isna(text):
+            return ""
+
+        text_clean = text.lower()
+        if not self.trigger.search(text_clean):
+            return text_clean.strip()
+
+        for compiled in self.passes:
+            text_clean = compiled.sub("", text_clean)
+
+        return text_clean.strip()
+
+    def clean_series(self, series):
+        # Los chats repiten mucho los mismos mensajes: se limpia cada valor
+        # distinto una sola vez y se reparte el resultado con los codigos.
+        codes, uniques = pd.factorize(series)
+        cleaned = np.array([self.clean(text) for text in uniques] + [""], dtype=object)
+        return pd.Series(cleaned[codes], index=series.index, dtype=object)
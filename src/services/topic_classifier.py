@@ -0,0 +1,208 @@
+"""Prediccion de los modelos guardados sin pasar por la validacion de sklearn.
+
+Para pocos mensajes por llamada la validacion de sklearn cuesta mas que el
+calculo; estas versiones usan los parametros ajustados directamente
+(idf_, cluster_centers_, exp_dirichlet_component_, components_, ...).
+Comprobadas contra scikit-learn 1.4.2 y 1.9.1 con tests/test_topic_classifier.py;
+al subir de version hay que volver a correr esas pruebas.
+"""
+import numpy as np
+import scipy.sparse as sp
+from scipy.special import psi
+
+from services.clustering import (
+    ENGINES,
+    KMeansEngine,
+    LDAEngine,
+    NMFEngine,
+    centroid_scores,
+    topic_scores,
+)
+
+
+class _TfidfTransform:
+    # Misma salida que TfidfVectorizer.transform
+    def __init__(self, vectorizer):
+        self.analyzer = vectorizer.build_analyzer()
+        self.vocabulary = vectorizer.vocabulary_
+        self.n_features = len(self.vocabulary)
+        self.binary = vectorizer.binary
+        self.sublinear_tf = vectorizer.sublinear_tf
+        self.idf = np.asarray(vectorizer.idf_) if vectorizer.use_idf else None
+        self.norm = vectorizer.norm
+        self.dtype = vectorizer.dtype
+
+    def __call__(self, texts):
+        indices = []
+        data = []
+        indptr = [0]
+        for text in texts:
+            counts = {}
+            for term in self.analyzer(text):
+                index = self.vocabulary.get(term)
+                if index is not None:
+                    counts[index] = counts.get(index, 0) + 1
+            indices.extend(counts)
+            data.extend(counts.values())
+            indptr.append(len(indices))
+
+        X = sp.csr_matrix(
+            (np.asarray(data, dtype=self.dtype), np.asarray(indices, dtype=np.int32),
+             np.asarray(indptr, dtype=np.int32)),
+            shape=(len(texts), self.n_features)
+        )
+        X.sort_indices()
+        if self.binary:
+            X.data[:] = 1
+        if self.sublinear_tf:
+            np.log(X.data, out=X.data)
+            X.data += 1
+        if self.idf is not None:
+            X.data *= self.idf[X.indices]
+        if self.norm:
+            rows = np.repeat(np.arange(X.shape[0]), np.diff(X.indptr))
+            values = X.data ** 2 if self.norm == "l2" else np.abs(X.data)
+            totals = np.bincount(rows, values, minlength=X.shape[0])
+            if self.norm == "l2":
+                totals = np.sqrt(totals)
+            totals[totals == 0] = 1
+            X.data /= totals[rows]
+        return X
+
+
+class _KMeansPredict:
+    def __init__(self, model):
+        centers = np.asarray(model.cluster_centers_)
+        self.centers_t = np.ascontiguousarray(centers.T)
+        self.center_sq = (centers ** 2).sum(axis=1)
+
+    def __call__(self, X):
+        rows = np.repeat(np.arange(X.shape[0]), np.diff(X.indptr))
+        x_sq = np.bincount(rows, X.data ** 2, minlength=X.shape[0])
+        squared = x_sq[:, None] - 2 * (X @ self.centers_t) + self.center_sq
+        distances = np.sqrt(np.maximum(squared, 0))
+        clusters = distances.argmin(axis=1)
+        return clusters, centroid_scores(distances, clusters)
+
+
+class _LDAPredict:
+    # Paso E de LatentDirichletAllocation.transform, con todos los mensajes
+    # del lote a la vez; cada uno deja de actualizarse cuando converge
+    def __init__(self, model):
+        self.topic_word_t = np.ascontiguousarray(np.asarray(model.exp_dirichlet_component_).T)
+        self.prior = model.doc_topic_prior_
+        self.max_iter = model.max_doc_update_iter
+        self.tol = model.mean_change_tol
+
+    def __call__(self, X):
+        n_messages, n_topics = X.shape[0], self.topic_word_t.shape[1]
+        rows = np.repeat(np.arange(n_messages), np.diff(X.indptr))
+        word_topic = self.topic_word_t[X.indices]
+        eps = np.finfo(X.dtype).eps
+
+        doc_topic = np.ones((n_messages, n_topics))
+        exp_doc_topic = np.exp(psi(doc_topic) - psi(doc_topic.sum(axis=1, keepdims=True)))
+        active = np.ones(n_messages, dtype=bool)
+        for _ in range(self.max_iter):
+            norm_phi = (exp_doc_topic[rows] * word_topic).sum(axis=1) + eps
+            weighted = sp.csr_matrix((X.data / norm_phi, X.indices, X.indptr), shape=X.shape)
+            updated = exp_doc_topic * (weighted @ self.topic_word_t) + self.prior
+            change = np.abs(updated - doc_topic).mean(axis=1)
+
+            doc_topic[active] = updated[active]
+            exp_doc_topic[active] = np.exp(
+                psi(updated[active]) - psi(updated[active].sum(axis=1, keepdims=True))
+            )
+            active &= change >= self.tol
+            if not active.any():
+                break
+
+        doc_topic /= doc_topic.sum(axis=1, keepdims=True)
+        return doc_topic.argmax(axis=1), topic_scores(doc_topic)
+
+
+class _NMFPredict:
+    # Descenso por coordenadas de NMF.transform (solver cd, sin regularizacion),
+    # mensaje por mensaje: el resultado no depende del resto del lote
+    def __init__(self, model):
+        components_t = np.ascontiguousarray(np.asarray(model.components_).T)
+        self.components_t = components_t
+        self.gram = components_t.T @ components_t
+        self.tol = model.tol
+        self.max_iter = model.max_iter
+
+    @staticmethod
+    def supports(model):
+        return model.solver == "cd" and not model.shuffle and model.alpha_W == 0
+
+    def __call__(self, X):
+        n_topics = self.gram.shape[0]
+        projected = np.asarray(X @ self.components_t)
+        W = np.zeros((X.shape[0], n_topics))
+        # Violacion de la primera iteracion, por mensaje (todos activos)
+        initial = None
+        active = np.arange(X.shape[0])
+        for _ in range(self.max_iter):
+            Wa = W[active]
+            Pa = projected[active]
+            violation = np.zeros(len(active))
+            for t in range(n_topics):
+                grad = Wa @ self.gram[t] - Pa[:, t]
+                violation += np.abs(np.where(Wa[:, t] == 0, np.minimum(grad, 0), grad))
+                if self.gram[t, t] != 0:
+                    Wa[:, t] = np.maximum(Wa[:, t] - grad / self.gram[t, t], 0)
+            W[active] = Wa
+
+            if initial is None:
+                initial = violation
+                done = initial == 0
+            else:
+                done = violation / initial[active] <= self.tol
+            active = active[~done]
+            if not len(active):
+                break
+
+        return W.argmax(axis=1), topic_scores(W)
+
+
+class TopicClassifier:
+    # Asigna mensajes nuevos a los temas de un modelo guardado
+    def __init__(self, meta, vectorizer, model, preprocess):
+        self.meta = meta
+        self.engine = ENGINES[meta["engine"]](**meta["params"])
+        self.engine.model = model
+        self.keywords = meta["keywords"]
+        # preprocess: lista de textos -> lista de textos limpios
+        self.preprocess = preprocess
+
+        self.transform = _TfidfTransform(vectorizer)
+        if isinstance(self.engine, KMeansEngine):
+            self.predict = _KMeansPredict(model)
+        elif isinstance(self.engine, LDAEngine):
+            self.predict = _LDAPredict(model)
+        elif isinstance(self.engine, NMFEngine) and _NMFPredict.supports(model):
+            self.predict = _NMFPredict(model)
+        else:
+            self.predict = self.engine.predict
+
+        # Primera transformacion fuera del camino de los pedidos
+        self.classify(["mensaje"])
+
+    def classify(self, texts):
+        X = self.transform(self.preprocess(texts))
+        clusters, scores = self.predict(X)
+        # Sin terminos conocidos no hay tema que asignar
+        known = np.diff(X.indptr) > 0
+
+        results = []
+        for cluster, score, has_terms in zip(clusters, scores, known):
+            if not has_terms:
+                results.append({"topic": None, "score": None, "keywords": []})
+                continue
+            cluster = int(cluster)
+            results.append({
+                "topic": cluster,
+                "score": round(float(score), 4),
+                "keywords": self.keywords.get(str(cluster), []),
+            })
+        return results
@@ -0,0 +1,135 @@
+import hashlib
+import json
+import numbers
+import os
+from dataclasses import asdict, dataclass
+from functools import cached_property
+
+import numpy as np
+
+# NLTK, scipy y sklearn se importan al usarlos (tardan segundos en cargarse)
+
+
+BASIC_STOP_WORDS = [
+    "de", "la", "que", "el", "en", "y", "a", "los", "se", "del", "las",
+    "un", "por", "con", "una", "su", "para", "es", "al", "lo", "como",
+    "mas", "pero", "sus", "le", "ya", "o", "este", "si", "porque", "muy",
+    "sin", "sobre", "mi", "hay", "bien", "cuando", "ahora", "esta", "asi",
+    "nos", "ni", "ese", "eso", "esto", "etc", "otro", "tras"
+]
+
+CHAT_STOP_WORDS = [
+    "aea", "ya", "asi", "osea", "sea", "pues", "bueno", "igual", "tipo",
+    "nomas", "nomás", "asu", "asuu", "ah", "eh", "oh", "mmm", "umm",
+    "este", "esta", "esto", "ps", "pe", "nel", "simon", "simón", "ora",
+    "tons", "entonces", "aja", "ajá", "dale", "va", "nel", "pos", "pss"
+]
+
+
+@dataclass(frozen=True)
+class VectorizerConfig:
+    stop_words: tuple
+    token_pattern: str = r"(?u)\b\w\w+\b"
+    ngram_range: tuple = (1, 2)
+    min_df: int = 1  # Para pocos mensajes
+    max_df: float = 0.95
+
+    @classmethod
+    def build(cls):
+        from nltk.corpus import stopwords
+        stop_words = set(stopwords.words('spanish'))
+        stop_words.update(BASIC_STOP_WORDS, CHAT_STOP_WORDS)
+        return cls(stop_words=tuple(sorted(stop_words)))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        data["stop_words"] = tuple(data["stop_words"])
+        data["ngram_range"] = tuple(data["ngram_range"])
+        return cls(**data)
+
+    @classmethod
+    def load_or_build(cls, path=None):
+        # Reutiliza la configuracion guardada para no releer el corpus de NLTK
+        if path and os.path.exists(path):
+            return cls.load(path)
+        config = cls.build()
+        if path:
+            config.save(path)
+        return config
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(asdict(self), f, ensure_ascii=False)
+
+    @cached_property
+    def stop_words_list(self):
+        # TfidfVectorizer solo acepta listas como stop_words
+        return list(self.stop_words)
+
+    @cached_property
+    def fingerprint(self):
+        data = json.dumps(asdict(self), ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()[:16]
+
+    def make_vectorizer(self, **overrides):
+        params = {
+            "min_df": self.min_df,
+            "max_df": self.max_df,
+            "ngram_range": self.ngram_range,
+            "token_pattern": self.token_pattern,
+            "stop_words": self.stop_words_list,
+        }
+        params.update(overrides)
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        return TfidfVectorizer(**params)
+
+    def fit_weighted(self, texts, weights, **overrides):
+        # Igual que make_vectorizer(**overrides).fit_transform sobre el corpus
+        # con cada texto repetido weights[i] veces, pero contando cada uno una vez
+        import scipy.sparse as sp
+        from sklearn.preprocessing import normalize
+        params = {"min_df": self.min_df, "max_df": self.max_df, "max_features": None}
+        params.update(overrides)
+        weights = np.asarray(weights, dtype=np.float64)
+        n_docs = weights.sum()
+
+        counter = self.make_vectorizer(min_df=1, max_df=1.0, max_features=None, use_idf=False, norm=None)
+        counts = counter.fit_transform(texts).tocsc()
+        present = counts.copy()
+        present.data[:] = 1
+        doc_freq = weights @ present
+        # Mismas reglas de poda que CountVectorizer, con frecuencias ponderadas
+        max_df, min_df = params["max_df"], params["min_df"]
+        keep = doc_freq <= (max_df if isinstance(max_df, numbers.Integral) else max_df * n_docs)
+        keep &= doc_freq >= (min_df if isinstance(min_df, numbers.Integral) else min_df * n_docs)
+        if params["max_features"] is not None and keep.sum() > params["max_features"]:
+            term_freq = weights @ counts
+            best = (-term_freq[keep]).argsort()[:params["max_features"]]
+            limited = np.zeros_like(keep)
+            limited[np.flatnonzero(keep)[best]] = True
+            keep = limited
+        if not keep.any():
+            raise ValueError("Despues de la poda no quedan terminos")
+
+        terms = counter.get_feature_names_out()[keep]
+        idf = np.log((1 + n_docs) / (1 + doc_freq[keep])) + 1
+        vectorizer = self.make_vectorizer(vocabulary=list(terms))
+        # Con vocabulario fijo el ajuste solo inicializa el idf, que se reemplaza
+        vectorizer.fit([""])
+        vectorizer.idf_ = idf
+        X = normalize(counts[:, keep].tocsr() @ sp.diags(idf))
+        return vectorizer, X
+
+    def make_hashing_vectorizer(self, n_features, norm=None):
+        # Sin vocabulario que ajustar: sirve para modelos que crecen por lotes
+        from sklearn.feature_extraction.text import HashingVectorizer
+        return HashingVectorizer(
+            n_features=n_features,
+            norm=norm,
+            alternate_sign=False,
+            ngram_range=self.ngram_range,
+            token_pattern=self.token_pattern,
+            stop_words=self.stop_words_list,
+        )
@@ -0,0 +1,52 @@
+import zipfile
+
+
+ZIP_CHUNK_SIZE = 1 << 20
+
+
+class _ChunkWriter:
+    # Destino sin seek: zipfile escribe descriptores de datos en lugar de
+    # volver atras a corregir las cabeceras
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def compression_for(level):
+    # 0 guarda sin comprimir; 1-9 es el nivel de deflate
+    if level == 0:
+        return zipfile.ZIP_STORED, None
+    return zipfile.ZIP_DEFLATED, level
+
+
+def iter_zip(files, compression_level=6, chunk_size=ZIP_CHUNK_SIZE):
+    # files: pares (nombre, texto); se comprimen y se entregan por partes
+    compression, compresslevel = compression_for(compression_level)
+    writer = _ChunkWriter()
+    with zipfile.ZipFile(writer, "w", compression, compresslevel=compresslevel) as zipf:
+        for name, text in files:
+            data = text.encode("utf-8")
+            # Sin seek el tamaño no se corrige despues: zip64 se decide antes
+            force_zip64 = len(data) > zipfile.ZIP64_LIMIT
+            with zipf.open(name, "w", force_zip64=force_zip64) as entry:
+                for start in range(0, len(data), chunk_size):
+                    entry.write(data[start:start + chunk_size])
+                    chunk = writer.drain()
+                    if chunk:
+                        yield chunk
+            chunk = writer.drain()
+            if chunk:
+                yield chunk
+    # Directorio central
+    yield writer.drain()
@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from stub_openai import StubHandler, start_server  # noqa: E402
+
+
+@pytest.fixture
+def openai_stub(monkeypatch):
+    # Contadores y fallos por prueba; devuelve la base_url del servidor
+    monkeypatch.setattr(StubHandler, "latency", 0.05)
+    for name in ("requests", "active", "max_active"):
+        monkeypatch.setattr(StubHandler, name, 0)
+    monkeypatch.setattr(StubHandler, "log_message", lambda self, format, *args: None)
+    server = start_server()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1"
+    server.shutdown()
+    server.server_close()
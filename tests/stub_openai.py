@@ -0,0 +1,81 @@
+"""Servidor local que imita /v1/chat/completions de OpenAI.
+
+Lo usan las pruebas (fixture openai_stub en conftest.py) y
+benchmarks/stub_openai.py para probar los resumenes a mano.
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    fail_rate = 0.0
+    # Los primeros fail_first pedidos fallan siempre (para pruebas repetibles)
+    fail_first = 0
+    fail_status = 429
+    retry_after = 0.1
+    requests = 0
+    active = 0
+    max_active = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        cls = type(self)
+        with cls.lock:
+            cls.requests += 1
+            cls.active += 1
+            cls.max_active = max(cls.max_active, cls.active)
+            fail = cls.requests <= cls.fail_first
+        try:
+            time.sleep(cls.latency)
+            if fail or random.random() < cls.fail_rate:
+                # Igual que OpenAI al pasar el limite o con el servicio saturado
+                self._send(cls.fail_status, {"error": {"message": "Rate limit", "type": "requests"}},
+                           {"Retry-After": str(cls.retry_after)})
+                return
+            prompt = body["messages"][-1]["content"]
+            self._send(200, {
+                "id": f"chatcmpl-{cls.requests}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body["model"],
+                "choices": [{
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {
+                        "role": "assistant",
+                        "content": f"Resumen de prueba ({len(prompt)} caracteres)",
+                    },
+                }],
+                "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": 5,
+                          "total_tokens": len(prompt) // 4 + 5},
+            })
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+    def _send(self, status, payload, headers=None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        cls = type(self)
+        print(f"{self.command} {self.path} -> pedidos={cls.requests} "
+              f"simultaneos_max={cls.max_active}")
+
+
+def start_server(port=0):
+    # Devuelve el servidor ya atendiendo en un hilo aparte
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,45 @@
+import pandas as pd
+import pytest
+
+from services.chat_analyzer import ChatAnalyzer
+from services.vectorizer_config import VectorizerConfig
+
+
+def make_frame(texts):
+    return pd.DataFrame({
+        "fecha_hora": pd.date_range("2023-01-01", periods=len(texts), freq="min"),
+        "usuario": pd.Categorical(["51911"] * len(texts)),
+        "mensaje_original": texts,
+        "mensaje_limpio": texts,
+    })
+
+
+@pytest.fixture
+def analyzer():
+    analyzer = ChatAnalyzer()
+    # Sin stopwords de NLTK
+    analyzer.vectorizer_config = VectorizerConfig(stop_words=())
+    return analyzer
+
+
+def test_one_group_builds_no_engine(analyzer, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("no deberia elegirse un motor")
+
+    monkeypatch.setattr("services.chat_analyzer.make_engine", fail)
+    df, keywords = analyzer.cluster_messages(
+        make_frame(["futbol gol", "pizza queso", "futbol cancha"]), "auto", n_groups=1
+    )
+
+    assert df["cluster"].tolist() == [0, 0, 0]
+    assert df.attrs["clustering"]["engine"] is None
+    assert df.attrs["clustering"]["params"] == {}
+    assert list(keywords) == [0]
+
+
+def test_several_groups_report_the_engine_used(analyzer):
+    texts = ["futbol gol cancha", "pizza queso cena", "examen clase nota"] * 4
+    df, _ = analyzer.cluster_messages(make_frame(texts), "kmeans", n_groups=3)
+
+    assert df.attrs["clustering"]["engine"] == "kmeans"
+    assert df["cluster"].nunique() == 3
@@ -0,0 +1,83 @@
+import io
+
+import pandas as pd
+
+from services import metrics
+from services.chat_analyzer import ChatAnalyzer
+from services.chat_loader import (
+    build_batch,
+    concat_batches,
+    iter_message_chunks,
+    iter_raw_messages,
+    iter_text_lines,
+)
+
+
+CHAT = (
+    "01/02/23, 10:00 - 51911: hola\r\n"
+    "segunda linea\n"
+    "\n"
+    "tercera linea\n"
+    "01/02/23, 10:05 - Se unio alguien al grupo\n"
+    "linea suelta que no es de nadie\n"
+    "02/02/23, 23:59 - 51922: otro ñandú\n"
+    "31/02/23, 08:00 - 51911: fecha que no existe\n"
+)
+
+
+def test_continuation_lines_join_the_previous_message():
+    records = list(iter_raw_messages(iter_text_lines(io.BytesIO(CHAT.encode("utf-8")), block_size=7)))
+
+    assert records == [
+        ("01/02/23", "10:00", "51911", "hola\nsegunda linea\ntercera linea"),
+        ("02/02/23", "23:59", "51922", "otro ñandú"),
+        ("31/02/23", "08:00", "51911", "fecha que no existe"),
+    ]
+
+
+def test_chunks_keep_every_message():
+    records = list(iter_raw_messages(CHAT.splitlines()))
+    chunks = list(iter_message_chunks(CHAT.splitlines(), chunk_size=2))
+
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    assert [record for chunk in chunks for record in chunk] == records
+
+
+def test_build_batch_types_and_filters_empty_messages():
+    records = list(iter_raw_messages(CHAT.splitlines()))
+    batch = build_batch(records, ["hola", "", "fecha"])
+
+    assert list(batch.columns) == ["fecha_hora", "usuario", "mensaje_original", "mensaje_limpio"]
+    assert pd.api.types.is_datetime64_any_dtype(batch["fecha_hora"])
+    assert isinstance(batch["usuario"].dtype, pd.CategoricalDtype)
+    assert batch["mensaje_original"].dtype == object
+    assert batch["mensaje_limpio"].tolist() == ["hola", "fecha"]
+    assert batch["fecha_hora"].iloc[0] == pd.Timestamp("2023-02-01 10:00")
+    # Fecha con forma valida pero inexistente: NaT
+    assert pd.isna(batch["fecha_hora"].iloc[1])
+
+
+def test_concat_batches_matches_pd_concat():
+    batches = [
+        build_batch([("01/02/23", "10:00", "b", "x"), ("01/02/23", "10:01", "a", "y")], ["x", "y"]),
+        build_batch([("02/02/23", "11:00", "c", "z"), ("02/02/23", "11:01", "b", "w")], ["z", "w"]),
+    ]
+    expected = pd.concat(batches, ignore_index=True)
+    expected["usuario"] = expected["usuario"].astype(str).astype("category")
+
+    result = concat_batches(iter(batches))
+
+    pd.testing.assert_frame_equal(result, expected)
+    assert list(result["usuario"].cat.categories) == ["a", "b", "c"]
+    assert concat_batches(iter([])) is None
+
+
+def test_invalid_dates_are_counted():
+    analyzer = ChatAnalyzer()
+    # Sin NLTK: el texto original sirve de texto limpio
+    analyzer.preprocess_texts = lambda texts: list(texts)
+    with metrics.collect() as timings:
+        df = analyzer.load_chat(io.BytesIO(CHAT.encode("utf-8")))
+
+    assert len(df) == 3
+    assert timings.counters["invalid_dates"] == 1
@@ -0,0 +1,77 @@
+import asyncio
+import time
+
+import pytest
+
+from services.chat_summarizer import ChatSummarizer
+from services.rate_limiter import TokenBucket
+from services.result_cache import ResultCache
+from stub_openai import StubHandler
+
+
+INPUTS = {
+    topic: ({0: f"10:00 - {topic}: mensaje del tema {topic}"}, [f"clave{topic}"], [0])
+    for topic in range(6)
+}
+
+
+def summarize(base_url, cache=None, requests_per_minute=6000):
+    summarizer = ChatSummarizer(
+        "test", base_url=base_url, max_concurrency=2,
+        requests_per_minute=requests_per_minute, max_retries=3, cache=cache
+    )
+    return asyncio.run(summarizer._summarize_and_close(INPUTS))
+
+
+def test_topics_run_in_parallel_up_to_the_concurrency(openai_stub):
+    summaries = summarize(openai_stub)
+
+    assert sorted(summaries) == sorted(INPUTS)
+    assert all(summary.startswith("Resumen de prueba") for summary in summaries.values())
+    assert StubHandler.requests == len(INPUTS)
+    assert StubHandler.max_active == 2
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_retries_wait_for_retry_after(openai_stub, monkeypatch, status):
+    monkeypatch.setattr(StubHandler, "fail_first", 2)
+    monkeypatch.setattr(StubHandler, "fail_status", status)
+    monkeypatch.setattr(StubHandler, "retry_after", 0.3)
+
+    start = time.monotonic()
+    summaries = summarize(openai_stub)
+
+    assert all(summary.startswith("Resumen de prueba") for summary in summaries.values())
+    assert StubHandler.requests == len(INPUTS) + 2
+    assert time.monotonic() - start >= 0.3
+
+
+def test_errors_that_are_not_temporary_are_not_retried(openai_stub, monkeypatch):
+    monkeypatch.setattr(StubHandler, "fail_first", 1)
+    monkeypatch.setattr(StubHandler, "fail_status", 400)
+
+    summaries = summarize(openai_stub)
+
+    assert sum(summary.startswith("Error generating summary") for summary in summaries.values()) == 1
+    assert StubHandler.requests == len(INPUTS)
+
+
+def test_cached_summaries_are_not_requested_again(openai_stub, tmp_path):
+    cache = ResultCache(str(tmp_path))
+    first = summarize(openai_stub, cache=cache)
+    StubHandler.requests = 0
+
+    assert summarize(openai_stub, cache=cache) == first
+    assert StubHandler.requests == 0
+
+
+def test_zero_requests_per_minute_means_no_limit(openai_stub):
+    summaries = summarize(openai_stub, requests_per_minute=0)
+
+    assert len(summaries) == len(INPUTS)
+
+
+def test_token_bucket_rejects_rates_that_never_refill():
+    for rate in (0, -1, None):
+        with pytest.raises(ValueError):
+            TokenBucket(rate)
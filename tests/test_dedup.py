@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from services.dedup import NUM_PERM, collapse_duplicates, near_duplicate_roots
+
+
+BASE = "el partido de futbol del sabado empieza a las ocho en la cancha del colegio con todo el equipo"
+TEXTS = [
+    "hola", BASE, "nos vemos", "", "hola", BASE + " completo", "nos vemos", "", BASE,
+    "la pizza de la cena estuvo muy rica con queso y aceitunas en el restaurante nuevo",
+]
+
+
+def make_signatures(changes):
+    # Cada fila copia a la anterior y cambia las posiciones dadas: la
+    # similitud entre dos filas es la fraccion de posiciones iguales
+    rng = np.random.default_rng(0)
+    rows = [rng.integers(0, 2 ** 63, NUM_PERM, dtype=np.uint64)]
+    for positions in changes:
+        row = rows[-1].copy()
+        row[list(positions)] = rng.integers(0, 2 ** 63, len(positions), dtype=np.uint64)
+        rows.append(row)
+    return np.stack(rows)
+
+
+def test_exact_duplicates_collapse_to_the_first_occurrence():
+    collapsed = collapse_duplicates(["a b", "c d", "a b", "", "c d", ""], threshold=None)
+
+    assert collapsed.n_unique == 3
+    assert collapsed.representatives.tolist() == [0, 1, 3]
+    assert collapsed.inverse.tolist() == [0, 1, 0, 2, 1, 2]
+    assert collapsed.weights.tolist() == [2, 2, 2]
+
+
+def test_near_duplicates_collapse_only_with_a_threshold():
+    exact = collapse_duplicates(TEXTS, threshold=None)
+    near = collapse_duplicates(TEXTS)
+
+    assert exact.n_unique == 6
+    assert near.n_unique == 5
+    assert near.inverse[5] == near.inverse[1] == near.inverse[8]
+    assert near.inverse[9] != near.inverse[1]
+
+
+@pytest.mark.parametrize("threshold, collapsed", [(0.875, True), (0.876, False)])
+def test_threshold_boundary(threshold, collapsed):
+    # 8 de 64 posiciones distintas: similitud 0.875
+    signatures = make_signatures([range(8)])
+
+    roots = near_duplicate_roots(signatures, threshold)
+
+    assert roots.tolist() == ([0, 0] if collapsed else [0, 1])
+
+
+def test_chains_do_not_join_messages_unlike_the_representative():
+    # a~b y b~c con 0.875, pero a y c solo 0.75
+    signatures = make_signatures([range(8), range(8, 16)])
+
+    assert near_duplicate_roots(signatures, 0.8).tolist() == [0, 0, 2]
+
+
+@pytest.mark.parametrize("threshold", [None, 0.8])
+def test_weights_count_every_row(threshold):
+    collapsed = collapse_duplicates(TEXTS, threshold)
+
+    assert collapsed.weights.sum() == len(TEXTS)
+    assert collapsed.weights.tolist() == np.bincount(collapsed.inverse).tolist()
+    # El representante es el primer mensaje de su grupo
+    assert (collapsed.inverse[collapsed.representatives] == np.arange(collapsed.n_unique)).all()
+    assert collapsed.representatives.tolist() == sorted(collapsed.representatives.tolist())
+
+
+def test_expand_restores_row_order_and_length():
+    texts = np.array(TEXTS, dtype=object)
+    exact = collapse_duplicates(TEXTS, threshold=None)
+    near = collapse_duplicates(TEXTS)
+
+    assert exact.expand(texts[exact.representatives]).tolist() == TEXTS
+    labels = near.expand(np.arange(near.n_unique) * 10)
+    assert len(labels) == len(TEXTS)
+    assert labels.tolist() == [group * 10 for group in near.inverse]
+    assert labels[5] == labels[1]
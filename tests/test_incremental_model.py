@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.incremental_model import IncrementalTopicModel, TopicModelStore
+from services.vectorizer_config import VectorizerConfig
+
+
+TOPICS = [
+    "partido futbol gol equipo cancha",
+    "pizza cena comida restaurante almuerzo",
+    "examen profesor tarea clase curso",
+]
+
+
+def make_chat(n, seed=0):
+    rng = np.random.default_rng(seed)
+    texts = []
+    for i in range(n):
+        words = TOPICS[i % len(TOPICS)].split()
+        texts.append(" ".join(rng.choice(words, size=4)) + f" m{i}")
+    return pd.DataFrame({
+        "fecha_hora": pd.date_range("2022-01-01", periods=n, freq="min"),
+        "usuario": pd.Categorical(["51900000001"] * n),
+        "mensaje_original": texts,
+        "mensaje_limpio": texts,
+    })
+
+
+class CountingVectorizer:
+    def __init__(self, vectorizer, calls):
+        self.vectorizer = vectorizer
+        self.calls = calls
+
+    def transform(self, texts):
+        self.calls.append(len(texts))
+        return self.vectorizer.transform(texts)
+
+    def build_analyzer(self):
+        return self.vectorizer.build_analyzer()
+
+
+@pytest.mark.parametrize("method", ["kmeans", "lda"])
+def test_update_only_processes_new_messages(method):
+    config = VectorizerConfig(stop_words=())
+    model = IncrementalTopicModel(
+        "chat", config, method=method, n_groups=3, n_features=2 ** 12, drift_threshold=100
+    )
+    calls = []
+    make_vectorizer = model._vectorizer
+    model._vectorizer = lambda: CountingVectorizer(make_vectorizer(), calls)
+
+    chat = make_chat(300)
+    first_clusters, first_scores, _, info = model.update(chat.iloc[:200].copy())
+    assert info["refit"] and calls == [200]
+
+    clusters, scores, _, info = model.update(chat.copy())
+    assert not info["refit"] and info["new_messages"] == 100
+    assert calls == [200, 100]
+    # Los anteriores conservan su grupo; los nuevos se predicen con el modelo actualizado
+    np.testing.assert_array_equal(clusters[:200], first_clusters)
+    np.testing.assert_array_equal(scores[:200], first_scores)
+    expected, expected_scores = model._predict(make_vectorizer().transform(chat["mensaje_limpio"][200:]))
+    np.testing.assert_array_equal(clusters[200:], expected)
+    np.testing.assert_allclose(scores[200:], expected_scores)
+
+    # Sin mensajes nuevos no se vectoriza nada
+    again, _, _, info = model.update(chat.copy())
+    assert calls == [200, 100] and info["new_messages"] == 0
+    np.testing.assert_array_equal(again, clusters)
+
+
+def test_only_engines_with_partial_fit_are_accepted():
+    with pytest.raises(ValueError):
+        IncrementalTopicModel("chat", VectorizerConfig(stop_words=()), method="nmf")
+
+
+def test_models_saved_with_another_format_are_discarded(tmp_path):
+    store = TopicModelStore(str(tmp_path))
+    model = IncrementalTopicModel("chat", VectorizerConfig(stop_words=()), method="kmeans")
+    store.save(model)
+    assert store.load("chat").format_version == model.format_version
+
+    model.format_version = None
+    store.save(model)
+    assert store.load("chat") is None
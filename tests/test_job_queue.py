@@ -0,0 +1,52 @@
+import threading
+import time
+
+from services.job_queue import JobManager
+
+
+def test_shutdown_fails_and_cleans_up_jobs_that_never_started():
+    manager = JobManager(max_workers=1, max_queue=5)
+    started = threading.Event()
+    release = threading.Event()
+    closed = []
+
+    def work(value, progress=None):
+        started.set()
+        release.wait(5)
+        return value
+
+    jobs = [
+        manager.submit(work, i, cleanup=lambda i=i: closed.append(i))
+        for i in range(4)
+    ]
+    assert started.wait(5)
+    manager.shutdown()
+
+    assert [job.state for job in jobs[1:]] == ["error"] * 3
+    assert all(job.finished_at is not None for job in jobs[1:])
+    assert sorted(closed) == [1, 2, 3]
+
+    # El que ya corria termina normalmente y libera su lugar
+    release.set()
+    deadline = time.time() + 5
+    while jobs[0].state != "done" and time.time() < deadline:
+        time.sleep(0.01)
+    assert jobs[0].result == 0
+    assert sorted(closed) == [0, 1, 2, 3]
+    assert manager._pending == 0
+
+
+def test_expired_and_shutdown_results_are_discarded():
+    discarded = []
+    manager = JobManager(max_workers=1, result_ttl=60, on_discard=discarded.append)
+    jobs = [manager.submit(lambda value, progress=None: value, i) for i in range(2)]
+    deadline = time.time() + 5
+    while not all(job.finished for job in jobs) and time.time() < deadline:
+        time.sleep(0.01)
+
+    jobs[0].finished_at -= 120
+    assert manager.get(jobs[0].id) is None
+    assert discarded == [jobs[0]]
+
+    manager.shutdown()
+    assert discarded == jobs
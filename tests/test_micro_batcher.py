@@ -0,0 +1,73 @@
+import asyncio
+import threading
+
+import pytest
+
+from services.micro_batcher import BatcherClosedError, MicroBatcher
+
+
+def test_concurrent_requests_share_one_call_off_the_event_loop():
+    calls = []
+
+    def fn(items):
+        calls.append((list(items), threading.get_ident()))
+        return [item * 2 for item in items]
+
+    async def run():
+        batcher = MicroBatcher(fn, max_batch=10, max_wait=0.05)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+        batcher.close()
+        return results
+
+    assert asyncio.run(run()) == [0, 2, 4, 6, 8]
+    assert [items for items, _ in calls] == [[0, 1, 2, 3, 4]]
+    assert calls[0][1] != threading.get_ident()
+
+
+def test_errors_reach_every_request_of_the_batch():
+    def fn(items):
+        raise RuntimeError("falla")
+
+    async def run():
+        batcher = MicroBatcher(fn, max_wait=0.01)
+        return await asyncio.gather(
+            *(batcher.submit(i) for i in range(3)), return_exceptions=True
+        )
+
+    assert [str(result) for result in asyncio.run(run())] == ["falla"] * 3
+
+
+def test_close_finishes_queued_requests_and_rejects_new_ones():
+    started = threading.Event()
+    release = threading.Event()
+
+    def fn(items):
+        started.set()
+        release.wait(5)
+        return list(items)
+
+    async def run():
+        batcher = MicroBatcher(fn, max_batch=2)
+        pending = [asyncio.ensure_future(batcher.submit(i)) for i in range(5)]
+        await asyncio.sleep(0)
+        await asyncio.to_thread(started.wait, 5)
+        # Desde otro hilo, como al desalojar de la cache de clasificadores
+        await asyncio.to_thread(batcher.close)
+        release.set()
+        results = await asyncio.wait_for(asyncio.gather(*pending), 5)
+
+        with pytest.raises(BatcherClosedError):
+            await batcher.submit(99)
+        await asyncio.wait_for(batcher._task, 5)
+        return results
+
+    assert asyncio.run(run()) == [0, 1, 2, 3, 4]
+
+
+def test_close_before_first_use():
+    batcher = MicroBatcher(lambda items: items)
+    batcher.close()
+
+    with pytest.raises(BatcherClosedError):
+        asyncio.run(batcher.submit(1))
+    assert batcher._task is None
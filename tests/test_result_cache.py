@@ -0,0 +1,147 @@
+import io
+import json
+
+import pytest
+
+from services import json_stream
+from services.json_stream import (
+    JsonEncoder,
+    NdjsonEncoder,
+    TopicStream,
+    iter_cached_json,
+    iter_encoded,
+    iter_json,
+    read_messages,
+    topics_from_index,
+)
+from services.result_cache import ResultCache
+
+
+KEY = "a" * 64
+META = {"status": "success", "result_id": KEY}
+
+
+def make_topics(sizes=(2500, 0, 7), chunk_size=1000):
+    topics = []
+    for topic, size in enumerate(sizes):
+        records = [
+            {"fecha": "01/02/23", "hora": "10:00", "usuario": str(topic), "mensaje_original": f"m{topic}-{i} ñ"}
+            for i in range(size)
+        ]
+        chunks = [records[start:start + chunk_size] for start in range(0, size, chunk_size)]
+        topics.append(TopicStream(topic, [f"k{topic}"], size, True, chunks, [0, 1] if size > 1 else None))
+    return topics
+
+
+def all_records(topic):
+    return [record for chunk in topic.chunks for record in chunk]
+
+
+def test_index_ranges_read_each_chunk_on_its_own():
+    index = {}
+    content = b"".join(iter_json(META, make_topics(), index=index))
+    result = json.loads(content)
+
+    assert index["meta"] == META
+    assert content[:index["topics_offset"]].endswith(b'"topics":{')
+    file = io.BytesIO(content)
+    topics = list(topics_from_index(index, file))
+    for data, topic in zip(index["topics"], topics):
+        messages = result["topics"][str(data["topic"])]["messages"]
+        assert all_records(topic) == messages
+        positions = [p for p in (0, 3, 999, 1000, 2499) if p < len(messages)]
+        assert read_messages(file, data, positions) == {p: messages[p] for p in positions}
+
+
+def test_cached_json_keeps_the_topics_bytes_and_rebuilds_the_header():
+    index = {}
+    content = b"".join(iter_json(META, make_topics(), index=index))
+    extra = {**META, "timings": {"total_seconds": 1.0}}
+
+    cached = b"".join(iter_cached_json(extra, index, io.BytesIO(content), block_size=100))
+
+    assert cached[-(len(content) - index["topics_offset"]):] == content[index["topics_offset"]:]
+    assert json.loads(cached) == {**json.loads(content), "timings": {"total_seconds": 1.0}}
+
+
+def test_ndjson_reuses_the_serialized_records():
+    lines = [
+        json.loads(line)
+        for line in b"".join(iter_encoded(NdjsonEncoder(META), make_topics())).splitlines()
+    ]
+    messages = [line for line in lines if line["type"] == "message"]
+
+    expected = [
+        {"type": "message", "topic": topic.topic, **record}
+        for topic in make_topics() for record in all_records(topic)
+    ]
+    assert messages == expected
+    assert [list(line) for line in messages[:1]] == [list(expected[0])]
+
+
+def test_one_pass_feeds_the_response_and_the_cache():
+    index, written = {}, []
+    response = b"".join(iter_encoded(
+        NdjsonEncoder(META, include_messages=False), make_topics(),
+        copy=(JsonEncoder(META, index=index), written.append)
+    ))
+
+    assert b"".join(written) == b"".join(iter_json(META, make_topics()))
+    assert b'"type":"message"' not in response
+    assert len(index["topics"]) == 3
+
+
+def test_writer_keeps_nothing_when_the_stream_is_abandoned(tmp_path):
+    cache = ResultCache(str(tmp_path))
+
+    def stream():
+        index = {}
+        with cache.writer(KEY, index) as file:
+            yield from iter_encoded(
+                JsonEncoder(META), make_topics(), copy=(JsonEncoder(META, index=index), file.write)
+            )
+
+    chunks = stream()
+    next(chunks)
+    chunks.close()
+    assert cache.open(KEY) is None
+    assert list(tmp_path.iterdir()) == []
+
+    b"".join(stream())
+    index, file = cache.open(KEY)
+    with file:
+        assert json.loads(file.read()) == json.loads(b"".join(iter_json(META, make_topics())))
+    assert index["meta"] == META
+
+    assert cache.invalidate(KEY)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_entries_without_index_count_as_misses(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    cache.put(KEY, b"{}")
+
+    assert cache.get(KEY) == b"{}"
+    assert cache.open(KEY) is None
+    with pytest.raises(ValueError):
+        cache.writer("../x").__enter__()
+
+
+def test_stdlib_fallback_writes_the_same_bytes(monkeypatch):
+    expected = b"".join(iter_json(META, make_topics()))
+    monkeypatch.setattr(json_stream, "orjson", None)
+
+    assert b"".join(iter_json(META, make_topics())) == expected
+    assert json_stream.dumps({1: "ñ"}) == '{"1":"ñ"}'.encode("utf-8")
+
+
+def test_directory_is_created_on_first_write(tmp_path):
+    directory = tmp_path / "cache"
+    cache = ResultCache(str(directory))
+
+    assert cache.open(KEY) is None
+    assert cache.clear() == 0
+    assert not directory.exists()
+
+    cache.put(KEY, b"{}")
+    assert cache.get(KEY) == b"{}"
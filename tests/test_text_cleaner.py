@@ -0,0 +1,106 @@
+import re
+
+import pandas as pd
+import pytest
+
+from services.text_cleaner import CLEANING_RULES, MessageCleaner
+
+
+# Copia del ChatAnalyzer.clean_message original: un re.sub por patron
+LEGACY_PATTERNS = [
+    r"[\U0001F300-\U0001F9FF]",  # Emojis
+    r"\b(?:xd+|:v|v:|umu|uwu|:\'v|:\'\'v)\b",  # Emotes básicos
+    r"http[s]?://\S+",  # URLs
+    r"stk-\d+-wa\d+\.webp",  # Stickers
+    r"img-\d+-wa\d+\.jpg",  # Imágenes
+    r"<se editó este mensaje\.>",
+    r"<multimedia omitido>",
+    r"\bx\d+\b",
+    r"\(archivo adjunto\)",
+    r"zzz+",
+    r"se eliminó este mensaje\.",
+    r"\b(enlace|unir|unió|unido)\b",
+    r"(añadió|añadiste)\b",
+    r"\b(?:tmr|ctmr|ptm|ptmr|mrd|mrda|csm|ctm)\b",
+    r"\b(?:xd+|XD+|xD+|Xd+)\b",
+    r"\b(?:wtf|wdf|wtff|wdff)\b",
+    r"\b(?:ps|pe|pe\'|pex|pz|pue|pueh)\b",
+    r"\b(?:pls|plz|porfa)\b",
+    r"\b(?:ok|okk|okey|oki|okis)\b",
+    r"(?:\.{2,}|\?{2,}|\!{2,})",
+]
+
+
+def legacy_clean(text):
+    if pd.isna(text):
+        return ""
+    text_clean = text.lower()
+    for pattern in LEGACY_PATTERNS:
+        text_clean = re.sub(pattern, "", text_clean)
+    return text_clean.strip()
+
+
+CORPUS = [
+    "Hola a todos 😂😂",
+    "XD jajaja",
+    "xddd no puede ser",
+    "uwu :v v: umu",
+    "Miren esto https://www.youtube.com/watch?v=abc123 está bueno",
+    "STK-20220101-WA0001.webp (archivo adjunto)",
+    "IMG-20220101-WA0042.jpg (archivo adjunto)",
+    "<Multimedia omitido>",
+    "<Se editó este mensaje.>",
+    "Se eliminó este mensaje.",
+    "x2 x10 por favor",
+    "zzzzz qué sueño",
+    "Juan añadió a Pedro",
+    "Añadiste a María",
+    "te envié el enlace para unir al grupo, ya se unió",
+    "tmr ctmr ptm mrd csm qué pasó",
+    "wtf wdff broo",
+    "ya pe ps pex pue pueh",
+    "pls plz porfa ayuda",
+    "ok okk okey oki okis listo",
+    "en serio??? noo!!! bueno...",
+    # Reglas de palabra completa seguidas: borrar una no debe unir las vecinas
+    "ok pls ok",
+    "okpls pe ok pe",
+    "pe ok wtf pls tmr enlace x5",
+    "ps.pe-ok_pls",
+    "tmrok okmrd",
+    "oki, okis; okey",
+    "xd:v",
+    "texto normal sin nada que limpiar",
+    "",
+    "   espacios   ",
+    "ÑANDÚ ÁRBOL ÉPICO",
+    "Mensaje\nde varias\nlíneas ok",
+]
+
+
+@pytest.fixture(scope="module")
+def cleaner():
+    return MessageCleaner()
+
+
+def test_rules_match_legacy_patterns():
+    assert [pattern for pattern, _ in CLEANING_RULES] == LEGACY_PATTERNS
+
+
+def test_consecutive_whole_word_rules_are_merged(cleaner):
+    # tmr/xd/wtf/ps/pls/ok son seis reglas seguidas de palabra completa
+    assert len(cleaner.passes) < len(CLEANING_RULES)
+    assert any(pass_.pattern.count("(?:") >= 6 for pass_ in cleaner.passes)
+
+
+@pytest.mark.parametrize("text", CORPUS)
+def test_clean_matches_legacy(cleaner, text):
+    assert cleaner.clean(text) == legacy_clean(text)
+
+
+def test_clean_series_matches_legacy(cleaner):
+    texts = CORPUS * 3 + [None, float("nan")]
+    series = pd.Series(texts, index=range(10, 10 + len(texts)))
+    cleaned = cleaner.clean_series(series)
+    assert list(cleaned.index) == list(series.index)
+    assert cleaned.tolist() == [legacy_clean(text) for text in texts]
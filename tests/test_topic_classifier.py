@@ -0,0 +1,116 @@
+import random
+
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from services.clustering import ENGINES, topic_scores
+from services.topic_classifier import (
+    TopicClassifier,
+    _KMeansPredict,
+    _LDAPredict,
+    _NMFPredict,
+    _TfidfTransform,
+)
+
+
+TOPICS = [
+    "partido futbol gol equipo jugador cancha",
+    "pizza cena comida queso restaurante postre",
+    "examen profesor nota tarea clase curso",
+    "viaje playa hotel vuelo vacaciones maleta",
+]
+
+
+def make_texts(n, seed):
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(n):
+        words = rng.choice(TOPICS).split()
+        texts.append(" ".join(rng.choice(words) for _ in range(rng.randint(1, 8))))
+    # Sin terminos conocidos y con terminos repetidos
+    return texts + ["", "zzz desconocido", "gol gol gol gol"]
+
+
+TRAIN = make_texts(400, seed=1)
+NEW = make_texts(200, seed=2)
+
+
+@pytest.mark.parametrize("params", [
+    {},
+    {"ngram_range": (1, 2), "min_df": 2},
+    {"sublinear_tf": True, "norm": "l1"},
+    {"binary": True, "norm": None},
+    {"use_idf": False},
+    {"dtype": np.float32},
+])
+def test_tfidf_transform_matches_sklearn(params):
+    vectorizer = TfidfVectorizer(**params).fit(TRAIN)
+
+    expected = vectorizer.transform(NEW)
+    actual = _TfidfTransform(vectorizer)(NEW)
+
+    assert actual.dtype == expected.dtype
+    assert actual.shape == expected.shape
+    assert abs(actual - expected).max() < 1e-6
+
+
+def fitted(method, n_groups=4):
+    vectorizer = TfidfVectorizer().fit(TRAIN)
+    engine = ENGINES[method]()
+    engine.fit_predict(vectorizer.transform(TRAIN), n_groups)
+    return vectorizer, engine
+
+
+@pytest.mark.parametrize("method", ["kmeans", "minibatch_kmeans"])
+def test_kmeans_predict_matches_sklearn(method):
+    vectorizer, engine = fitted(method)
+    X = vectorizer.transform(NEW)
+
+    clusters, scores = _KMeansPredict(engine.model)(X)
+
+    assert (clusters == engine.model.predict(X)).all()
+    distances = engine.model.transform(X)
+    np.testing.assert_allclose(scores, -distances[np.arange(X.shape[0]), clusters], atol=1e-6)
+
+
+@pytest.mark.parametrize("method", ["lda", "online_lda"])
+def test_lda_predict_matches_sklearn(method):
+    vectorizer, engine = fitted(method)
+    X = vectorizer.transform(NEW)
+
+    clusters, scores = _LDAPredict(engine.model)(X)
+
+    doc_topic = engine.model.transform(X)
+    assert (clusters == doc_topic.argmax(axis=1)).all()
+    np.testing.assert_allclose(scores, topic_scores(doc_topic), atol=1e-6)
+
+
+def test_nmf_predict_matches_sklearn_per_message():
+    vectorizer, engine = fitted("nmf")
+    X = vectorizer.transform(NEW)
+    assert _NMFPredict.supports(engine.model)
+
+    clusters, scores = _NMFPredict(engine.model)(X)
+
+    # NMF.transform decide la convergencia por lote; aqui es por mensaje
+    doc_topic = np.vstack([engine.model.transform(X[i]) for i in range(X.shape[0])])
+    known = doc_topic.sum(axis=1) > 0
+    assert (clusters[known] == doc_topic[known].argmax(axis=1)).all()
+    np.testing.assert_allclose(scores, topic_scores(doc_topic), atol=1e-4)
+
+
+@pytest.mark.parametrize("method", ["kmeans", "lda", "nmf"])
+def test_classifier_matches_the_engine(method):
+    vectorizer, engine = fitted(method)
+    meta = {"engine": method, "params": {}, "keywords": {}}
+    classifier = TopicClassifier(meta, vectorizer, engine.model, lambda texts: texts)
+
+    results = classifier.classify(NEW)
+
+    X = vectorizer.transform(NEW)
+    clusters, _ = engine.predict(X)
+    known = np.diff(X.indptr) > 0
+    assert [result["topic"] for result in results] == [
+        int(cluster) if has_terms else None for cluster, has_terms in zip(clusters, known)
+    ]